@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+
+from benchmarks.models import Wide, COLUMNS
+from sqlalchemy_zdb.compiler import QUERY_CACHE
+
+
+@pytest.fixture
+def session():
+    """Unbound session, queries are compiled but never executed."""
+    return Session()
+
+
+@pytest.fixture
+def compiler():
+    dialect = postgresql.dialect()
+    return dialect.statement_compiler(dialect, None)
+
+
+@pytest.fixture
+def columns():
+    return [getattr(Wide, "col_%d" % i) for i in range(COLUMNS)]
+
+
+@pytest.fixture(autouse=True)
+def query_cache():
+    QUERY_CACHE.clear()
+    yield QUERY_CACHE
+    QUERY_CACHE.clear()
@@ -0,0 +1,17 @@
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Unicode
+from sqlalchemy.dialects.postgresql import BIGINT
+
+from sqlalchemy_zdb.types import ZdbColumn
+
+COLUMNS = 200
+
+base = declarative_base(name="BenchmarkModel")
+
+
+# synthetic table with many indexed columns
+Wide = type("Wide", (base,), dict(
+    __tablename__="wide",
+    id=Column(BIGINT, nullable=False, primary_key=True),
+    **{"col_%d" % i: ZdbColumn(Unicode(64)) for i in range(COLUMNS)}
+))
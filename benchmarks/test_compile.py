@@ -0,0 +1,99 @@
+from sqlalchemy import and_, or_
+
+from benchmarks.models import Wide
+from sqlalchemy_zdb import ZdbQuery, zdb_raw_query
+from sqlalchemy_zdb.compiler import escape_tokens, compile_clause, compile_zdb_query
+from sqlalchemy_zdb.normalizer import normalize
+from sqlalchemy_zdb.planner import split
+
+LONG_TEXT = "the quick (brown) fox: jumps* over? the [lazy] dog! " * 200
+
+
+def wide_and(columns):
+    return and_(*[column == "value %d" % i for i, column in enumerate(columns)])
+
+
+def deep_or(columns, depth=25):
+    clause = columns[0] == "leaf"
+    for i in range(1, depth):
+        # alternate, SQLAlchemy flattens nested clauses with the same operator
+        if i % 2:
+            clause = or_(columns[i] == "value %d" % i, clause)
+        else:
+            clause = and_(columns[i] == "value %d" % i, clause)
+    return clause
+
+
+def test_escape_tokens(benchmark):
+    benchmark(escape_tokens, LONG_TEXT)
+
+
+def test_compile_clause_wide_and(benchmark, compiler, columns):
+    clause = wide_and(columns)
+    benchmark(lambda: compile_clause(clause, compiler, set(), []))
+
+
+def test_compile_clause_deep_or(benchmark, compiler, columns):
+    clause = deep_or(columns)
+    benchmark(lambda: compile_clause(clause, compiler, set(), []))
+
+
+def test_reflect_wide_and(benchmark, columns):
+    clauses = [column == "value" for column in columns]
+
+    def run():
+        exprs = split(ZdbQuery._zdb_reflect(clauses))
+        return normalize(exprs["zdb"])
+    benchmark(run)
+
+
+def test_make_query_wide_and(benchmark, session, columns):
+    q = ZdbQuery(Wide, session=session)
+    for i, column in enumerate(columns):
+        q = q.filter(column == "value %d" % i)
+
+    def setup():
+        # a fresh clone has no memo, every round builds the query
+        return (q._clone(),), {}
+    benchmark.pedantic(ZdbQuery._zdb_build, setup=setup, rounds=200)
+
+
+def test_make_query_wide_and_memoized(benchmark, session, columns):
+    q = ZdbQuery(Wide, session=session)
+    for i, column in enumerate(columns):
+        q = q.filter(column == "value %d" % i)
+    benchmark(q._zdb_make_query)
+
+
+def test_compile_zdb_query_wide_and(benchmark, compiler, columns):
+    element = zdb_raw_query(*[column == "value %d" % i for i, column in enumerate(columns)])
+    benchmark(compile_zdb_query, element, compiler)
+
+
+def test_compile_zdb_query_wide_and_uncached(benchmark, compiler, columns, query_cache):
+    element = zdb_raw_query(*[column == "value %d" % i for i, column in enumerate(columns)])
+    benchmark.pedantic(compile_zdb_query, args=(element, compiler),
+                       setup=query_cache.clear, rounds=200)
+
+
+def test_compile_zdb_query_deep_or(benchmark, compiler, columns):
+    element = zdb_raw_query(deep_or(columns))
+    benchmark(compile_zdb_query, element, compiler)
+
+
+def test_compile_zdb_query_large_in(benchmark, compiler, columns):
+    element = zdb_raw_query(columns[0].in_(["value %d" % i for i in range(1000)]))
+    benchmark(compile_zdb_query, element, compiler)
+
+
+def test_compile_zdb_query_long_text(benchmark, compiler, columns):
+    element = zdb_raw_query(*[column == LONG_TEXT for column in columns[:10]])
+    benchmark(compile_zdb_query, element, compiler)
+
+
+def test_compile_statement(benchmark, session, columns):
+    q = ZdbQuery(Wide, session=session, bind_query=True)
+    for i, column in enumerate(columns[:20]):
+        q = q.filter(column == "value %d" % i)
+    q = q.filter(columns[20].in_(["a", "b", "c"]))
+    benchmark(q._zdb_compile)
@@ -29,6 +29,9 @@ setup(
         'sqlalchemy_utils',
         'psycopg2'
     ],
+    extras_require={
+        'asyncio': ['sqlalchemy>=1.4', 'asyncpg'],
+    },
     download_url=
         'https://github.com/skftn/sqlalchemy_zdb/archive/master.zip',
     packages=find_packages(),
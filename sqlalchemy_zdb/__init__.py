@@ -1,21 +1,28 @@
+import operator
 import weakref
 from typing import List
 
 import sqlalchemy
-from sqlalchemy.sql.elements import BindParameter, TextClause
+from sqlalchemy.sql.elements import BindParameter, TextClause, Grouping
 from sqlalchemy.sql.expression import (
-    BooleanClauseList, BinaryExpression, FunctionElement, UnaryExpression, ColumnElement)
+    BooleanClauseList, BinaryExpression, FunctionElement, UnaryExpression)
 from sqlalchemy.sql.annotation import AnnotatedColumn
 from sqlalchemy.orm.query import Query
-from sqlalchemy import Column, and_, func, text, inspect
+from sqlalchemy import Column, BigInteger, and_, func, text, inspect, not_, tuple_, select, literal_column
+from sqlalchemy.sql.operators import asc_op, desc_op
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm.scoping import scoped_session, Session
 
-from sqlalchemy_zdb.events import before_create, after_create
-from sqlalchemy_zdb.utils import is_zdb_table
-from sqlalchemy_zdb.types import ZdbColumn, ZdbScore
-from sqlalchemy.sql.schema import MetaData
-from sqlalchemy.ext.declarative.base import _declarative_constructor
+from sqlalchemy_zdb import instrumentation
+from sqlalchemy_zdb.events import before_create, after_create, catalog_snapshot
+from sqlalchemy_zdb.utils import is_zdb_table, get_zdb_index_name
+from sqlalchemy_zdb.types import ZdbColumn, ZdbScore, InternalTraversal, NO_CACHE
+from sqlalchemy_zdb.aggregates import Aggregate, zdb_aggregate
+from sqlalchemy_zdb.normalizer import normalize
+from sqlalchemy_zdb.planner import split, filter_columns
+from sqlalchemy_zdb.explain import (
+    ZdbExplain, zdb_explain, zdb_dump_query, parse_plan, parse_es_query, plan_timing)
+from sqlalchemy.sql.schema import MetaData, Table
 from sqlalchemy.ext.declarative import declarative_base, DeclarativeMeta
 
 
@@ -35,12 +42,21 @@ def bootstrap_events(f):
             _USER_BASE = base
             return base
         elif f.__name__ == "create_all":
-            tables = [v for k, v in _USER_BASE.metadata.tables.items()]
+            metadata = getattr(f, "__self__", None) or _USER_BASE.metadata
+            catalog_snapshot(metadata)
+            tables = [v for k, v in metadata.tables.items()]
             for table in tables:
                 if is_zdb_table(table):
                     before_create(table)
                     after_create(table)
-            f(*args, **kwargs)
+
+            # create_all(engine, zdb_indexes=False) leaves the ZomboDB
+            # indexes to sqlalchemy_zdb.indexes.build_indexes()
+            metadata.info["zdb_skip_indexes"] = not kwargs.pop("zdb_indexes", True)
+            try:
+                f(*args, **kwargs)
+            finally:
+                metadata.info.pop("zdb_skip_indexes", None)
         else:
             return f(*args, **kwargs)
     return wrapped
@@ -49,18 +65,23 @@ sqlalchemy.ext.declarative.declarative_base = bootstrap_events(sqlalchemy.ext.de
 
 
 class ZdbQuery(Query):
-    def __init__(self, entities, session=None):
+    def __init__(self, entities, session=None, bind_query=False):
         if isinstance(session, scoped_session):
             session = session()
         elif not isinstance(session, Session):
             raise Exception("Invalid session object")
 
         super(ZdbQuery, self).__init__(entities, session=session)
+        # never modified in place, see _zdb_replace()
         self._zdb_data = {
-            "filter": [],
-            "order": [],
+            "filter": (),
+            "order": (),
             "offset": 0,
-            "limit": None
+            "limit": None,
+            "bind_query": bind_query,
+            "cache": None,
+            "cache_ttl": None,
+            "push_limit": None
         }
 
     def _zdb_check_session(self):
@@ -71,29 +92,43 @@ class ZdbQuery(Query):
         self = self._zdb_make_query()
         return self.statement.compile(dialect=postgresql.dialect())
 
-    @staticmethod
-    def _zdb_clauses_by_column(clauses: List[ColumnElement]):
-        """Filters a list of expressions based on column types"""
-        _rtn = {"zdb": [], "sqla": []}
-        if not clauses: return _rtn
-
-        for expr in clauses:
-            if isinstance(expr, ZdbScore):
-                # LIMIT with ZdbScore
-                _rtn["zdb"].append(expr)
-                continue
-            elif isinstance(expr, UnaryExpression):
-                # regular ORDER_BY/DISTINCT
-                _columns = expr.element.base_columns
-            else:
-                # regular expression (no, not regex ;)
-                _columns = expr.left.base_columns
-
-            if type(next(iter(_columns))) == ZdbColumn:
-                _rtn["zdb"].append(expr)
-            else:
-                _rtn["sqla"].append(expr)
-        return _rtn
+    def _clone(self, *args, **kwargs):
+        q = super(ZdbQuery, self)._clone(*args, **kwargs)
+        q.__dict__.pop("_zdb_memo", None)
+        return q
+
+    if hasattr(Query, "_generate"):
+        # SQLAlchemy >= 1.4 copies queries through _generate()
+        def _generate(self):
+            q = super(ZdbQuery, self)._generate()
+            q.__dict__.pop("_zdb_memo", None)
+            return q
+
+    def _zdb_memoized(self, key, fn):
+        # a ZdbQuery never changes, what is derived from it can be kept
+        memo = self.__dict__.setdefault("_zdb_memo", {})
+        try:
+            return memo[key]
+        except KeyError:
+            value = memo[key] = fn()
+            return value
+
+    def _zdb_replace(self, **data):
+        r"""Copy of this query with some of ``_zdb_data`` replaced"""
+        q = self._clone()
+        q._zdb_data = dict(self._zdb_data, **data)
+        return q
+
+    def _zdb_exprs(self):
+        r"""Filters split into ``zdb`` and ``sqla`` expressions"""
+        def exprs():
+            # zdb-only parts of the filters left in SQL still run as zdb queries
+            bind_query = self._zdb_data["bind_query"]
+            rtn = split(self._zdb_reflect(self._zdb_data["filter"]),
+                        wrap=lambda c: zdb_raw_query(c, bind_query=bind_query))
+            rtn["zdb"] = normalize(rtn["zdb"])
+            return rtn
+        return self._zdb_memoized("exprs", exprs)
 
     @staticmethod
     def _zdb_reflect(clauses: list, _data=None):
@@ -109,59 +144,105 @@ class ZdbQuery(Query):
             elif isinstance(c, TextClause):
                 raise Exception("TextClause not supported")  # return c.text
             elif isinstance(c, BinaryExpression):
-                if not isinstance(c.left, AnnotatedColumn):
-                    raise Exception("Unsupported clause")
+                # comparisons on SQL expressions, func.lower(name) == ..., stay in SQL
                 _data.append(c)
             elif isinstance(c, BooleanClauseList):
-                _data = ZdbQuery._zdb_reflect(c, _data)
+                if c.operator == operator.or_:
+                    # kept as one filter, flattening would AND it
+                    _data.append(c)
+                else:
+                    _data = ZdbQuery._zdb_reflect(c, _data)
+            elif isinstance(c, Grouping):
+                _data = ZdbQuery._zdb_reflect([c.element], _data)
+            elif isinstance(c, UnaryExpression) and c.operator is not None:
+                # ~or_(...), ~and_(...), ~boolean_column
+                _data.append(c)
             elif isinstance(c, Column):
                 raise Exception(
                     "ColumnClause not supported")  # return compile_column_clause(c, compiler, tables, format_args)
         return _data
 
     def _zdb_make_query(self):
+        if getattr(self, "_zdb_built", False):
+            return self
+        return self._zdb_memoized("built", self._zdb_build)
+
+    def _zdb_sort_keys(self):
+        r"""The leading ``ZdbColumn``/``ZdbScore`` keys of ORDER BY,
+        the part of the ordering Elasticsearch can sort on"""
+        keys = []
+        for clause in self._zdb_data["order"]:
+            if not isinstance(clause, ZdbScore):
+                if not isinstance(clause, UnaryExpression) or clause.modifier not in (asc_op, desc_op):
+                    break
+                columns = clause.element.base_columns
+                if not columns or not all(type(c) == ZdbColumn for c in columns):
+                    break
+            keys.append(clause)
+        return keys
+
+    def _zdb_push_limit(self, exprs):
+        r"""Whether LIMIT/OFFSET can be applied by Elasticsearch through
+        ``#limit``, which is safe when nothing drops rows afterwards
+        and Elasticsearch sorts on all keys of the ordering"""
+        if self._zdb_data["limit"] is None:
+            return False
+        elif self._zdb_data["push_limit"] is not None:
+            return self._zdb_data["push_limit"]
+        elif len(self._zdb_sort_keys()) != len(self._zdb_data["order"]):
+            # Elasticsearch would cut ties on a SQL key arbitrarily
+            return False
+        elif exprs["sqla"]:
+            # SQL filters could drop some of the top hits
+            return False
+        return self._zdb_plain_select()
+
+    def _zdb_plain_select(self):
+        r"""True when every row of the query is a row of a single
+        table, no joins, DISTINCT or GROUP BY"""
+        froms = self.selectable.froms
+        if len(froms) != 1 or not isinstance(froms[0], Table):
+            return False
+        return not (getattr(self, "_distinct", False) or getattr(self, "_group_by", None) or
+                    getattr(self, "_group_by_clauses", None))
+
+    def _zdb_build(self):
         had_zdb_order = False
-        exprs = self._zdb_clauses_by_column(self._zdb_reflect(self._zdb_data["filter"]))
-        order = self._zdb_clauses_by_column(self._zdb_data["order"])
+        exprs = self._zdb_exprs()
+        order = list(self._zdb_data["order"])
 
         # insert zdb filters
         if len(exprs.get("zdb", 0)) >= 1:
             _order = {}
-            if order.get("zdb"):
+            if self._zdb_push_limit(exprs):
                 # needed later to ignore sqla limit/offset
                 had_zdb_order = True
-
-                # only ORDER_BY on one column in a zdb query
-                _order_clause = order["zdb"].pop(0)
                 _order = {
-                    "order_by": _order_clause,
+                    # the top hits by relevance when not ordered otherwise
+                    "order_by": self._zdb_sort_keys() or [ZdbScore("desc")],
                     "limit": self._zdb_data["limit"],
                     "offset": self._zdb_data["offset"]
                 }
 
-                # prepend a 'zdb_score()' to sqla ORDER_BY when using #limit(_score, ...)
-                if isinstance(_order_clause, ZdbScore):
-                    table = self.selectable.froms[0].name
-                    __order_clause = func.zdb_score(table, text("ctid"))
-                    __order_clause = getattr(__order_clause, _order_clause._zdb_direction)()
-                    order["sqla"].insert(0, __order_clause)
-                else:
-                    # prepend regular ORDER_BY to sqla when using #limit(<column_name)
-                    order["sqla"].insert(0, _order_clause)
-
-            # append remaining ORDER clauses to sqla
-            if order.get("zdb"):
-                order.get("sqla").append(*order["zdb"])
+            # the same ORDER BY in sqla, 'zdb_score()' for ZdbScore
+            if any(isinstance(clause, ZdbScore) for clause in order):
+                table = self.selectable.froms[0].name
+                order = [getattr(func.zdb_score(table, text("ctid")), clause._zdb_direction)()
+                         if isinstance(clause, ZdbScore) else clause for clause in order]
 
-            self = super(ZdbQuery, self).filter(zdb_raw_query(*exprs.get("zdb"), **_order))
+            self = super(ZdbQuery, self).filter(zdb_raw_query(
+                *exprs.get("zdb"), bind_query=self._zdb_data["bind_query"], **_order))
+        else:
+            # no zdb query to score
+            order = [clause for clause in order if not isinstance(clause, ZdbScore)]
 
         # insert remaining sqla filters
         for expr in exprs.get("sqla", []):
             self = super(ZdbQuery, self).filter(expr)
 
-        # insert remaining sqla order_by
-        if order.get("sqla"):
-            self = super(ZdbQuery, self).order_by(*order["sqla"])
+        # insert sqla order_by
+        if order:
+            self = super(ZdbQuery, self).order_by(*order)
 
         if not had_zdb_order:
             # insert sqla limit/offset
@@ -170,47 +251,407 @@ class ZdbQuery(Query):
             if self._zdb_data.get("offset"):
                 self = super(ZdbQuery, self).offset(self._zdb_data.get("offset"))
 
+        self = self._clone()
+        self._zdb_built = True
         return self
 
     def filter(self, *criterion):
-        if criterion:
-            self._zdb_data["filter"].append(*criterion)
-        return self
+        if getattr(self, "_zdb_built", False):
+            return super(ZdbQuery, self).filter(*criterion)
+        if not criterion:
+            return self
+        return self._zdb_replace(filter=self._zdb_data["filter"] + criterion)
 
     def limit(self, value: int):
-        self._zdb_data["limit"] = value
-        return self
+        if getattr(self, "_zdb_built", False):
+            return super(ZdbQuery, self).limit(value)
+        return self._zdb_replace(limit=value)
 
     def offset(self, value: int):
-        self._zdb_data["offset"] = value
-        return self
+        if getattr(self, "_zdb_built", False):
+            return super(ZdbQuery, self).offset(value)
+        return self._zdb_replace(offset=value)
 
     def order_by(self, *criterion: List[UnaryExpression]):
-        for order in criterion:
-            self._zdb_data["order"].append(order)
-        return self
+        if getattr(self, "_zdb_built", False):
+            return super(ZdbQuery, self).order_by(*criterion)
+        return self._zdb_replace(order=self._zdb_data["order"] + criterion)
+
+    def cache(self, result_cache=None, ttl: float = None):
+        r"""Serves ``all()`` from a result cache, see
+        ``sqlalchemy_zdb.resultcache.ResultCache``.
+        :param result_cache: ``ResultCache``, ``RESULT_CACHE`` by default
+        :param ttl: seconds to keep the results, the backend default otherwise
+        """
+        if result_cache is None:
+            from sqlalchemy_zdb.resultcache import RESULT_CACHE
+            result_cache = RESULT_CACHE
+        return self._zdb_replace(cache=result_cache, cache_ttl=ttl)
+
+    def push_limit(self, push: bool = True):
+        r"""Overrides whether ``limit()`` and ``offset()`` are applied
+        by Elasticsearch through ``#limit``. By default they are when
+        that can not change the results: no filters on regular columns,
+        joins, DISTINCT or GROUP BY, and an ``order_by()`` that is empty
+        or starts with a ``ZdbColumn`` or ``ZdbScore``.
+        :param push: ``True`` to always push them down, ``False`` to
+            leave them to Postgres, ``None`` for the default
+        """
+        return self._zdb_replace(push_limit=push)
+
+    def __iter__(self):
+        if not getattr(self, "_zdb_built", False):
+            return iter(self._zdb_make_query())
+        if instrumentation._listeners:
+            return instrumentation.instrument_iter(super(ZdbQuery, self).__iter__)
+        return super(ZdbQuery, self).__iter__()
+
+    def stream(self, batch_size: int = 1000):
+        r"""Yields results while reading them in batches of
+        ``batch_size`` from a server-side cursor, keeping memory
+        usage constant for large result sets.
+        :param batch_size: number of rows fetched per round trip
+        """
+        for row in self.yield_per(batch_size):
+            yield row
+
+    def paginate_keyset(self, order_by: UnaryExpression, page_size: int = 100):
+        r"""Iterates over all results, one page (list) at a time.
+
+        Instead of an ever growing offset, every page continues from
+        the last sort key seen through a range predicate on the zdb
+        column, so each page costs about the same. Rows that share the
+        last sort key are told apart by their primary key.
+
+        When the query has no plain SQL filters, the page is cut off
+        by Elasticsearch using ``#limit``, otherwise by Postgres.
+
+        Rows where the ``order_by`` column is NULL are not returned,
+        and many rows sharing one sort key make the pages that follow
+        them more expensive.
+
+        :param order_by: ``ZdbColumn.asc()`` or ``ZdbColumn.desc()``
+        :param page_size: number of rows per page
+        """
+        keyset = _ZdbKeyset(self, order_by, page_size)
+        while not keyset.done:
+            page = keyset.page(Query.all(keyset.query()))
+            if page:
+                yield page
+
+    def _zdb_count_statement(self):
+        r"""SELECT zdb_estimate_count(...) for this query, or None
+        when the count can not be answered by the index alone."""
+        exprs = self._zdb_exprs()
+        if not exprs["zdb"] or exprs["sqla"] or not self._zdb_plain_select():
+            return None
+        return select([zdb_estimate_count(zdb_raw_query(
+            *exprs["zdb"], bind_query=self._zdb_data["bind_query"]))])
+
+    def _zdb_count_result(self, count: int):
+        # apply LIMIT/OFFSET like SELECT count(*) over the query would
+        count = max(count - (self._zdb_data["offset"] or 0), 0)
+        if self._zdb_data["limit"] is not None:
+            count = min(count, self._zdb_data["limit"])
+        return count
+
+    def estimate_count(self):
+        r"""Number of matching rows as reported by Elasticsearch
+        through ``zdb_estimate_count()``, without visiting the heap.
+
+        Falls back to an exact ``SELECT count(*)`` when the query
+        has filters on regular (non ``ZdbColumn``) columns, joins,
+        DISTINCT or GROUP BY.
+        """
+        stmt = self._zdb_count_statement()
+        if stmt is None:
+            return super(ZdbQuery, self._zdb_make_query()).count()
+        return self._zdb_count_result(self.session.execute(stmt).scalar())
+
+    def count(self):
+        return self.estimate_count()
+
+    def _zdb_aggregate_statement(self, *aggregates: Aggregate):
+        exprs = self._zdb_exprs()
+        if exprs["sqla"]:
+            raise Exception("Aggregates only support filters on ZdbColumn")
+        if not aggregates:
+            raise Exception("No aggregates passed")
+
+        columns = []
+        for aggregate in aggregates:
+            query = None
+            if exprs["zdb"]:
+                query = zdb_raw_query(*exprs["zdb"], bind_query=self._zdb_data["bind_query"])
+            columns.append(zdb_aggregate(aggregate, query))
+        return select(columns)
+
+    def aggregate(self, *aggregates: Aggregate):
+        r"""Computes aggregations over the rows matching this query
+        in Elasticsearch, all of them in a single round trip.
+
+            from sqlalchemy_zdb.aggregates import terms, stats
+
+            authors, prices = q.aggregate(terms(Products.author), stats(Products.price))
+
+        :param aggregates: instances of ``sqlalchemy_zdb.aggregates.Aggregate``
+        :return: list with the parsed result of each aggregate
+        """
+        row = self.session.execute(self._zdb_aggregate_statement(*aggregates)).first()
+        return [aggregate.parse(value) for aggregate, value in zip(aggregates, row)]
+
+    def _zdb_mapper(self):
+        return inspect(self.column_descriptions[0]["entity"]).mapper
+
+    def _zdb_ids_query(self):
+        built = self if getattr(self, "_zdb_built", False) else self._zdb_make_query()
+        return Query.with_entities(built, *self._zdb_mapper().primary_key)
+
+    def _zdb_ids_result(self, rows):
+        if len(self._zdb_mapper().primary_key) == 1:
+            return [row[0] for row in rows]
+        return [tuple(row) for row in rows]
+
+    def ids(self):
+        r"""Primary keys of the matching rows in the order of the
+        query, without loading any other column. Composite primary
+        keys are returned as tuples.
+        """
+        return self._zdb_ids_result(Query.all(self._zdb_ids_query()))
+
+    def _zdb_ctids_query(self):
+        built = self if getattr(self, "_zdb_built", False) else self._zdb_make_query()
+        table = self._zdb_mapper().local_table.name
+        return Query.with_entities(built, literal_column("%s.ctid" % table))
+
+    def ctids(self):
+        r"""Physical row locations (``ctid``) of the matching rows
+        in the order of the query. Note that a ctid changes when
+        its row is updated.
+        """
+        return [row[0] for row in Query.all(self._zdb_ctids_query())]
+
+    def _zdb_hydrate_queries(self, ids: list, batch_size: int):
+        mapper = self._zdb_mapper()
+        pks = mapper.primary_key
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            q = self.session.query(mapper)
+            if len(pks) == 1:
+                yield q.filter(pks[0].in_(batch))
+            else:
+                yield q.filter(tuple_(*pks).in_(batch))
+
+    def _zdb_hydrate_result(self, ids: list, entities):
+        mapper = self._zdb_mapper()
+        found = {}
+        for entity in entities:
+            identity = tuple(mapper.primary_key_from_instance(entity))
+            found[identity if len(identity) > 1 else identity[0]] = entity
+        return [found[_id] for _id in ids if _id in found]
+
+    def hydrate(self, ids: list, batch_size: int = 500):
+        r"""Loads the entities of ``ids``, as returned by ``ids()``,
+        in batches of ``batch_size`` and in the order of ``ids``,
+        which keeps the ranking of Elasticsearch.
+
+            ids = q.order_by(ZdbScore("desc")).limit(10000).ids()
+            page = q.hydrate(ids[0:20])
+
+        Ids that no longer exist are left out.
+        """
+        entities = [entity for q in self._zdb_hydrate_queries(ids, batch_size) for entity in q]
+        return self._zdb_hydrate_result(ids, entities)
+
+    def _zdb_explain_statements(self, analyze: bool):
+        r"""The ``EXPLAIN`` statement of this query and the
+        ``zdb_dump_query()`` one, ``None`` without zdb filters"""
+        built = self if getattr(self, "_zdb_built", False) else self._zdb_make_query()
+        exprs = self._zdb_exprs()
+
+        dump = None
+        if exprs["zdb"]:
+            dump = select([zdb_dump_query(
+                zdb_raw_query(*exprs["zdb"], bind_query=self._zdb_data["bind_query"]))])
+        return zdb_explain(built.statement, analyze=analyze), dump
+
+    def _zdb_explain_result(self, plan, es_query, analyze: bool):
+        exprs = self._zdb_exprs()
+        dialect = postgresql.dialect()
+
+        plan = parse_plan(plan)
+        if es_query is not None:
+            es_query = parse_es_query(es_query)
+
+        sql_predicates = []
+        for expr in exprs["sqla"]:
+            try:
+                sql_predicates.append(str(expr.compile(dialect=dialect, compile_kwargs={"literal_binds": True})))
+            except Exception:
+                sql_predicates.append(str(expr.compile(dialect=dialect)))
+
+        timing = None
+        if analyze and exprs["zdb"]:
+            timing = plan_timing(plan, get_zdb_index_name(filter_columns(exprs["zdb"][0])[0].table))
+
+        return ZdbExplain(plan=plan, es_query=es_query,
+                          zdb_predicates=[str(zdb_raw_query(expr).compile(dialect=dialect))
+                                          for expr in exprs["zdb"]],
+                          sql_predicates=sql_predicates, timing=timing)
+
+    def explain(self, analyze: bool = False):
+        r"""Shows how a search is split between Elasticsearch and Postgres.
+
+            e = q.explain(analyze=True)
+            e.timing["index_scan"], e.timing["heap_fetch"], e.sql_predicates
+
+        :param analyze: run the query, ``EXPLAIN (ANALYZE, BUFFERS)``
+        :return: ``ZdbExplain`` with the Postgres ``plan`` (JSON), the
+            Elasticsearch query DSL from ``zdb_dump_query()`` as
+            ``es_query``, the ``zdb_predicates`` pushed down to
+            Elasticsearch, the ``sql_predicates`` left to Postgres and
+            with ``analyze``, the ``timing`` split in milliseconds
+        """
+        explain, dump = self._zdb_explain_statements(analyze)
+        plan = self.session.execute(explain).scalar()
+        es_query = self.session.execute(dump).scalar() if dump is not None else None
+        return self._zdb_explain_result(plan, es_query, analyze)
 
     def all(self):
-        self = self._zdb_make_query()
+        if not getattr(self, "_zdb_built", False):
+            self = self._zdb_make_query()
+        if self._zdb_data.get("cache") is not None:
+            return self._zdb_data["cache"].fetch(self, ttl=self._zdb_data["cache_ttl"])
         return super(ZdbQuery, self).all()
 
     def first(self):
-        self = self._zdb_make_query()
+        if not getattr(self, "_zdb_built", False):
+            self = self._zdb_make_query()
         return super(ZdbQuery, self).first()
 
 
-class zdb_score(FunctionElement):
+class _ZdbKeyset(object):
+    r"""State of ``ZdbQuery.paginate_keyset()``: ``query()`` is the
+    built query of the next page, ``page()`` takes its rows and
+    returns the page, until ``done``."""
+    def __init__(self, query: ZdbQuery, order_by: UnaryExpression, page_size: int):
+        if not isinstance(order_by, UnaryExpression):
+            raise Exception("Expected UnaryExpression for order_by")
+        column = next(iter(order_by.element.base_columns))
+        if not type(column) == ZdbColumn:
+            raise Exception("Expected ZdbColumn for keyset pagination")
+
+        self.order_by = order_by
+        self.page_size = page_size
+        self.ascending = order_by.modifier == asc_op
+        self.mapper = inspect(query.column_descriptions[0]["entity"]).mapper
+        self.key = self.mapper.get_property_by_column(column).key
+
+        exprs = query._zdb_exprs()
+        self.push_limit = exprs["zdb"] and not exprs["sqla"]
+
+        # a page of NULL sort keys would never move the keyset forward
+        self.base = query._zdb_replace(order=(), limit=None, offset=0).filter(order_by.element.isnot(None))
+
+        self.last = None
+        self.ties = set()
+        self.fetch = page_size
+        self.done = False
+
+    def query(self):
+        pks = self.mapper.primary_key
+        element = self.order_by.element
+        q = self.base
+        if self.last is not None:
+            q = q.filter(element >= self.last if self.ascending else element <= self.last)
+
+        if self.push_limit:
+            # fetch enough rows to skip the ties seen on the previous page
+            self.fetch = self.page_size + len(self.ties)
+            q = q.order_by(self.order_by, *[pk.asc() for pk in pks]).limit(self.fetch)
+            return q._zdb_make_query()
+
+        self.fetch = self.page_size
+        q = q._zdb_make_query()
+        if self.ties:
+            q = super(ZdbQuery, q).filter(not_(tuple_(*pks).in_(self.ties)))
+        q = super(ZdbQuery, q).order_by(self.order_by, *[pk.asc() for pk in pks])
+        return super(ZdbQuery, q).limit(self.fetch)
+
+    def page(self, rows: list):
+        mapper = self.mapper
+        page = []
+        for row in rows:
+            if tuple(mapper.primary_key_from_instance(row)) in self.ties:
+                continue
+            page.append(row)
+            if len(page) == self.page_size:
+                break
+
+        if page:
+            value = getattr(page[-1], self.key)
+            if value != self.last:
+                self.ties = set()
+            self.last = value
+            self.ties.update(tuple(mapper.primary_key_from_instance(row))
+                             for row in page if getattr(row, self.key) == self.last)
+
+        if len(rows) < self.fetch:
+            self.done = True
+        return page
+
+
+class _ZdbCacheKey(object):
+    r"""Adds what the compiler reads from the values of the bound
+    parameters (tables, literal types, literals that are rendered
+    inline) to the SQLAlchemy 1.4+ statement cache key."""
+    def _gen_cache_key(self, anon_map, bindparams):
+        from sqlalchemy_zdb.compiler import zdb_cache_key
+
+        key = super(_ZdbCacheKey, self)._gen_cache_key(anon_map, bindparams)
+        zdb_key = zdb_cache_key(self)
+        if zdb_key is None:
+            anon_map[NO_CACHE] = True
+            return key
+        return key + (zdb_key,)
+
+
+class zdb_score(_ZdbCacheKey, FunctionElement):
     name = 'zdb_score'
+    inherit_cache = True
+
+
+class zdb_estimate_count(FunctionElement):
+    name = 'zdb_estimate_count'
+    type = BigInteger()
+    inherit_cache = True
 
+    @property
+    def _from_objects(self):
+        # the table is passed by name, don't SELECT FROM it
+        return []
 
-class zdb_raw_query(FunctionElement):
+
+class zdb_raw_query(_ZdbCacheKey, FunctionElement):
     name = 'zdb_query'
 
-    def __init__(self, *criterion, order_by=None, offset=0, limit=None):
+    if InternalTraversal is not None:
+        _traverse_internals = FunctionElement._traverse_internals + [
+            ("_zdb_order_by", InternalTraversal.dp_clauseelement_tuple),
+            ("_zdb_limit", InternalTraversal.dp_plain_obj),
+            ("_zdb_offset", InternalTraversal.dp_plain_obj),
+            ("_zdb_bind_query", InternalTraversal.dp_boolean)
+        ]
+
+    def __init__(self, *criterion, order_by=None, offset=0, limit=None, bind_query=False):
+        from sqlalchemy_zdb.compiler import sort_keys
+
         super(zdb_raw_query, self).__init__(*criterion)
-        self._zdb_order_by = order_by
+        # several keys sort on several fields, #limit(_score desc, price asc, ...)
+        self._zdb_order_by = sort_keys(order_by)
         self._zdb_limit = limit
         self._zdb_offset = offset
+        self._zdb_bind_query = bind_query
 
 
 from sqlalchemy_zdb.compiler import compile_zdb_query
@@ -0,0 +1,151 @@
+import json
+from collections import namedtuple
+
+from sqlalchemy import literal
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.sql.expression import FunctionElement
+
+from sqlalchemy_zdb.types import ZdbColumn
+
+TermsBucket = namedtuple("TermsBucket", ["term", "count"])
+RangeBucket = namedtuple("RangeBucket", ["key", "low", "high", "doc_count"])
+DateHistogramBucket = namedtuple("DateHistogramBucket", ["key", "doc_count"])
+Stats = namedtuple("Stats", ["count", "total", "min", "max", "mean",
+                             "sum_of_squares", "variance", "std_deviation"])
+
+
+class Aggregate(object):
+    r"""Base class for aggregations that are pushed down to
+    Elasticsearch through one of ZomboDB's aggregate functions.
+
+    Subclasses name the SQL ``function``, the namedtuple ``result``
+    type of a bucket and compile their function ``arguments``.
+    """
+    function = None
+    result = None
+    many = True
+
+    def __init__(self, column):
+        base_column = next(iter(column.base_columns))
+        if not type(base_column) == ZdbColumn:
+            raise Exception("Expected ZdbColumn for zdb aggregate")
+        self.column = base_column
+
+    def arguments(self, table: str, query: str, compiler):
+        r"""SQL of the arguments passed to ``function``
+        :param table: quoted table name
+        :param query: SQL of the zdb query string
+        """
+        raise NotImplementedError()
+
+    def parse(self, value):
+        r"""Converts the JSON rows returned by ``function``"""
+        rows = value or []
+        values = [self.result(**{k: row.get(k) for k in self.result._fields}) for row in rows]
+        if not self.many:
+            return values[0] if values else None
+        return values
+
+    def _field(self):
+        return "'%s'" % self.column.name
+
+    @staticmethod
+    def _param(value, compiler):
+        return compiler.process(literal(value))
+
+
+class terms(Aggregate):
+    r"""Top terms of a field with their document count, using ``zdb_tally()``.
+
+        q.aggregate(terms(Products.author, size=20))
+        [TermsBucket(term='foo', count=2), ...]
+
+    :param size: maximum number of terms
+    :param stem: regular expression the terms need to match
+    :param order: ``count``, ``term``, ``reverse_count`` or ``reverse_term``
+    """
+    function = "zdb_tally"
+    result = TermsBucket
+
+    def __init__(self, column, size: int = 10, stem: str = "^.*", order: str = "count"):
+        super(terms, self).__init__(column)
+        if order not in ("count", "term", "reverse_count", "reverse_term"):
+            raise Exception("Invalid parameter for order")
+        self.size = size
+        self.stem = stem
+        self.order = order
+
+    def arguments(self, table, query, compiler):
+        return [table, self._field(), self._param(self.stem, compiler), query,
+                self._param(self.size, compiler), "'%s'" % self.order]
+
+
+class range_agg(Aggregate):
+    r"""Document counts for a list of ranges, using ``zdb_range_agg()``.
+
+        q.aggregate(range_agg(Products.price, [{"to": 1000}, {"from": 1000}]))
+        [RangeBucket(key='*-1000.0', low=None, high=1000.0, doc_count=1), ...]
+
+    :param ranges: list of dicts with an optional ``key``, ``from`` and ``to``
+    """
+    function = "zdb_range_agg"
+    result = RangeBucket
+
+    def __init__(self, column, ranges: list):
+        super(range_agg, self).__init__(column)
+        self.ranges = ranges
+
+    def arguments(self, table, query, compiler):
+        return [table, self._field(),
+                "CAST(%s AS json)" % self._param(json.dumps(self.ranges), compiler), query]
+
+
+class date_histogram(Aggregate):
+    r"""Document counts per date interval, using ``zdb_date_histogram_agg()``.
+
+        q.aggregate(date_histogram(Products.availability_date, interval="month"))
+
+    :param interval: ``year``, ``quarter``, ``month``, ``week``, ``day``,
+        ``hour``, ``minute`` or an Elasticsearch time unit like ``90m``
+    """
+    function = "zdb_date_histogram_agg"
+    result = DateHistogramBucket
+
+    def __init__(self, column, interval: str = "month"):
+        super(date_histogram, self).__init__(column)
+        self.interval = interval
+
+    def arguments(self, table, query, compiler):
+        return [table, self._field(), query, self._param(self.interval, compiler)]
+
+
+class stats(Aggregate):
+    r"""count/min/max/mean/variance of a numeric field, using
+    ``zdb_extended_stats_agg()``. Returns a single ``Stats``.
+    """
+    function = "zdb_extended_stats_agg"
+    result = Stats
+    many = False
+
+    def arguments(self, table, query, compiler):
+        return [table, self._field(), query]
+
+
+class zdb_aggregate(FunctionElement):
+    r"""Runs one ``Aggregate`` as a scalar subquery returning its
+    rows as JSON, so several aggregations fit in one SELECT."""
+    name = 'zdb_aggregate'
+    type = JSON()
+    # the aggregate arguments are rendered as new bound parameters
+    inherit_cache = False
+
+    def __init__(self, aggregate: Aggregate, query=None):
+        if query is None:
+            super(zdb_aggregate, self).__init__()
+        else:
+            super(zdb_aggregate, self).__init__(query)
+        self._zdb_aggregate = aggregate
+
+    @property
+    def _from_objects(self):
+        return []
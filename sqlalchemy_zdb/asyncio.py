@@ -0,0 +1,139 @@
+from sqlalchemy import func, select
+
+from sqlalchemy_zdb import ZdbQuery, _ZdbKeyset
+from sqlalchemy_zdb.aggregates import Aggregate
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession
+except ImportError:  # SQLAlchemy < 1.4
+    AsyncSession = None
+
+
+class AsyncZdbQuery(ZdbQuery):
+    r"""``ZdbQuery`` for ``sqlalchemy.ext.asyncio.AsyncSession``
+    (asyncpg or psycopg3), so searches waiting on Elasticsearch do
+    not block a thread and can run concurrently on one event loop.
+
+        q = AsyncZdbQuery(Products, session=async_session)
+        q = q.filter(Products.author == "foo")
+        products = await q.all()
+
+    Filters, ORDER BY, LIMIT and OFFSET are the same as for
+    ``ZdbQuery``, executing the query is awaited instead.
+    Requires SQLAlchemy 1.4 or later.
+    """
+    def __init__(self, entities, session=None, bind_query=False):
+        if AsyncSession is None:
+            raise Exception("AsyncZdbQuery requires SQLAlchemy 1.4 or later")
+        if not isinstance(session, AsyncSession):
+            raise Exception("Invalid session object")
+
+        super(AsyncZdbQuery, self).__init__(entities, session=session.sync_session,
+                                            bind_query=bind_query)
+        self._zdb_async_session = session
+
+    def _zdb_single_entity(self):
+        return len(self.column_descriptions) == 1 and \
+            self.column_descriptions[0]["entity"] is not None and \
+            self.column_descriptions[0]["type"] is self.column_descriptions[0]["entity"]
+
+    def _zdb_statement(self):
+        if not getattr(self, "_zdb_built", False):
+            self = self._zdb_make_query()
+        return self.statement
+
+    async def _zdb_execute(self, statement):
+        result = await self._zdb_async_session.execute(statement)
+        if self._zdb_single_entity():
+            return result.scalars()
+        return result
+
+    def __iter__(self):
+        raise Exception("AsyncZdbQuery can not be iterated, use `await q.all()` or `q.stream()`")
+
+    def __aiter__(self):
+        return self.stream()
+
+    async def all(self):
+        return (await self._zdb_execute(self._zdb_statement())).all()
+
+    async def first(self):
+        if not getattr(self, "_zdb_built", False):
+            self = self._zdb_make_query()
+        statement = super(ZdbQuery, self).limit(1).statement
+        return (await self._zdb_execute(statement)).first()
+
+    async def stream(self, batch_size: int = 1000):
+        r"""Yields results while reading them in batches of
+        ``batch_size`` from a server-side cursor.
+
+            async for product in q.stream(batch_size=500):
+                ...
+
+        :param batch_size: number of rows fetched per round trip
+        """
+        result = await self._zdb_async_session.stream(self._zdb_statement())
+        if self._zdb_single_entity():
+            result = result.scalars()
+        async for partition in result.partitions(batch_size):
+            for row in partition:
+                yield row
+
+    async def estimate_count(self):
+        r"""Awaitable version of ``ZdbQuery.estimate_count()``"""
+        stmt = self._zdb_count_statement()
+        if stmt is None:
+            stmt = select([func.count()]).select_from(self._zdb_statement().subquery())
+            return (await self._zdb_async_session.execute(stmt)).scalar()
+        return self._zdb_count_result((await self._zdb_async_session.execute(stmt)).scalar())
+
+    async def count(self):
+        return await self.estimate_count()
+
+    async def aggregate(self, *aggregates: Aggregate):
+        r"""Awaitable version of ``ZdbQuery.aggregate()``"""
+        result = await self._zdb_async_session.execute(self._zdb_aggregate_statement(*aggregates))
+        row = result.first()
+        return [aggregate.parse(value) for aggregate, value in zip(aggregates, row)]
+
+    async def ids(self):
+        r"""Awaitable version of ``ZdbQuery.ids()``"""
+        result = await self._zdb_async_session.execute(self._zdb_ids_query().statement)
+        return self._zdb_ids_result(result.all())
+
+    async def ctids(self):
+        r"""Awaitable version of ``ZdbQuery.ctids()``"""
+        result = await self._zdb_async_session.execute(self._zdb_ctids_query().statement)
+        return [row[0] for row in result.all()]
+
+    async def hydrate(self, ids: list, batch_size: int = 500):
+        r"""Awaitable version of ``ZdbQuery.hydrate()``"""
+        entities = []
+        for q in self._zdb_hydrate_queries(ids, batch_size):
+            entities.extend((await self._zdb_async_session.execute(q.statement)).scalars().all())
+        return self._zdb_hydrate_result(ids, entities)
+
+    async def explain(self, analyze: bool = False):
+        r"""Awaitable version of ``ZdbQuery.explain()``"""
+        explain, dump = self._zdb_explain_statements(analyze)
+        plan = (await self._zdb_async_session.execute(explain)).scalar()
+        es_query = None
+        if dump is not None:
+            es_query = (await self._zdb_async_session.execute(dump)).scalar()
+        return self._zdb_explain_result(plan, es_query, analyze)
+
+    async def paginate_keyset(self, order_by, page_size: int = 100):
+        r"""Async generator version of ``ZdbQuery.paginate_keyset()``
+
+            async for page in q.paginate_keyset(Products.price.asc(), page_size=50):
+                ...
+        """
+        keyset = _ZdbKeyset(self, order_by, page_size)
+        while not keyset.done:
+            rows = (await self._zdb_execute(keyset.query().statement)).all()
+            page = keyset.page(rows)
+            if page:
+                yield page
+
+    def cache(self, result_cache=None, ttl: float = None):
+        raise Exception("AsyncZdbQuery does not support the result cache")
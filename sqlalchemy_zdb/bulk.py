@@ -0,0 +1,150 @@
+import io
+import json
+import time
+import datetime
+from collections import namedtuple
+from itertools import islice
+
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from sqlalchemy import Table, inspect
+from sqlalchemy.engine import Engine
+
+from sqlalchemy_zdb.utils import get_zdb_index_name, get_index_options, set_index_options, is_zdb_table
+
+BulkLoadResult = namedtuple("BulkLoadResult", ["rows", "batches", "seconds", "rows_per_second"])
+
+
+def _get_table(model):
+    if isinstance(model, Table):
+        return model
+    return inspect(model).local_table
+
+
+def _escape_copy(value: str):
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _array_element(value):
+    if value is None:
+        return "NULL"
+    value = _copy_value(value)
+    return '"%s"' % value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _copy_value(value):
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (list, tuple)):
+        return "{%s}" % ",".join(_array_element(v) for v in value)
+    elif isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def to_copy_row(values: list):
+    r"""Encodes a row in the text format of ``COPY ... FROM STDIN``"""
+    return "\t".join("\\N" if v is None else _escape_copy(_copy_value(v)) for v in values) + "\n"
+
+
+def _row_values(row, columns, mapper):
+    if isinstance(row, dict):
+        return [row.get(column.key) for column in columns]
+    return [getattr(row, mapper.get_property_by_column(column).key) for column in columns]
+
+
+def _copy(connection, table, columns, fileobj):
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert("COPY %s (%s) FROM STDIN" % (
+            table.name, ", ".join(column.name for column in columns)), fileobj)
+    finally:
+        cursor.close()
+
+
+def _in_failed_transaction(connection):
+    r"""True when an error aborted the transaction of ``connection``,
+    which then only takes a ROLLBACK"""
+    return connection.connection.get_transaction_status() == TRANSACTION_STATUS_INERROR
+
+
+def copy_file(connection, model, fileobj, columns: list = None):
+    r"""Streams a file that is already in ``COPY`` text format into a table.
+    :param connection: ``sqlalchemy.engine.Connection``
+    :param model: declarative class or ``sqlalchemy.Table``
+    :param fileobj: file-like object to read from
+    :param columns: columns in the file, all columns of the table by default
+    """
+    table = _get_table(model)
+    _copy(connection, table, columns or list(table.columns), fileobj)
+
+
+def bulk_load(bind, model, rows, batch_size: int = 10000, columns: list = None,
+              index_options: dict = None, progress=None):
+    r"""Loads rows into a (ZomboDB indexed) table using ``COPY ... FROM STDIN``,
+    which is a lot faster than inserting row by row.
+
+        bulk_load(engine, Products, rows, batch_size=5000,
+                  index_options={"refresh_interval": "-1"})
+
+    :param bind: ``sqlalchemy.engine.Engine`` or ``Connection``, an engine is
+        loaded in a transaction of its own
+    :param model: declarative class or ``sqlalchemy.Table``
+    :param rows: iterable of dicts (keyed on column name) or model instances
+    :param batch_size: number of rows per ``COPY``
+    :param columns: columns to load, all columns of the table by default
+    :param index_options: options to ``ALTER INDEX ... SET`` on the ZomboDB
+        index while loading, restored afterwards
+    :param progress: called with a ``BulkLoadResult`` after each batch
+    :return: ``BulkLoadResult``
+    """
+    if isinstance(bind, Engine):
+        with bind.begin() as connection:
+            return bulk_load(connection, model, rows, batch_size=batch_size, columns=columns,
+                             index_options=index_options, progress=progress)
+
+    table = _get_table(model)
+    columns = columns or list(table.columns)
+    mapper = None if isinstance(model, Table) else inspect(model)
+
+    index_name = get_zdb_index_name(table)
+    previous = None
+    if index_options and is_zdb_table(table):
+        current = get_index_options(index_name, bind)
+        previous = {k: current.get(k) for k in index_options}
+        set_index_options(index_name, index_options, bind)
+
+    count = 0
+    batches = 0
+    start = time.time()
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            buf = io.StringIO()
+            for row in batch:
+                buf.write(to_copy_row(_row_values(row, columns, mapper)))
+            buf.seek(0)
+            _copy(bind, table, columns, buf)
+
+            count += len(batch)
+            batches += 1
+            if progress:
+                seconds = time.time() - start
+                progress(BulkLoadResult(count, batches, seconds, count / seconds if seconds else 0.0))
+    except Exception:
+        # a database error aborted the transaction, its rollback
+        # restores the options
+        if previous is not None and not _in_failed_transaction(bind):
+            set_index_options(index_name, previous, bind)
+        raise
+
+    if previous is not None:
+        set_index_options(index_name, previous, bind)
+
+    seconds = time.time() - start
+    return BulkLoadResult(count, batches, seconds, count / seconds if seconds else 0.0)
@@ -0,0 +1,159 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheBackend(object):
+    r"""Interface of the backends of a ``ResultCache``. Values
+    need to be picklable for backends outside of the process."""
+    def get(self, key, default=None):
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl: float = None):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def info(self):
+        return {}
+
+
+class LRUCache(CacheBackend):
+    r"""Bounded mapping that evicts the least recently used entry
+    once ``maxsize`` is reached. A ``maxsize`` of 0 disables
+    the cache.
+
+    Keeps ``hits`` and ``misses`` counters, see ``info()``.
+    """
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
+
+
+def _sizeof(value, _seen=None):
+    # rough deep size of cached rows, not counting shared objects twice
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, _seen) + _sizeof(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v, _seen) for v in value)
+    elif hasattr(value, "__dict__"):
+        size += _sizeof({k: v for k, v in vars(value).items() if k != "_sa_instance_state"}, _seen)
+    return size
+
+
+class TTLCache(LRUCache):
+    r"""``LRUCache`` whose entries expire ``ttl`` seconds after
+    they were set. Also keeps an estimate of the memory used by
+    the cached values, see ``info()``.
+    """
+    def __init__(self, maxsize: int = 512, ttl: float = 60):
+        super(TTLCache, self).__init__(maxsize=maxsize)
+        self.ttl = ttl
+        self.memory = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, size, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                self.memory -= size
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        if not self.maxsize:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        size = _sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.memory -= self._data[key][1]
+            self._data[key] = (expires, size, value)
+            self._data.move_to_end(key)
+            self.memory += size
+            while len(self._data) > self.maxsize:
+                self.memory -= self._data.popitem(last=False)[1][1]
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.memory -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.memory = 0
+
+    def info(self):
+        info = super(TTLCache, self).info()
+        info.update({"ttl": self.ttl, "memory": self.memory})
+        return info
@@ -1,19 +1,34 @@
-import re
-import inspect
+import datetime
+import decimal
 import operator
+import time
+import threading
+import uuid
 
 import sqlalchemy
-from sqlalchemy import Column
+from sqlalchemy import Column, String, bindparam
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.sql.annotation import AnnotatedColumn
 from sqlalchemy.sql.elements import (
     BinaryExpression, BindParameter, TextClause, BooleanClauseList, Grouping,
-    False_, True_, UnaryExpression, Null)
+    ClauseList, False_, True_, UnaryExpression, Null, AsBoolean)
 
-from sqlalchemy_zdb import zdb_raw_query, zdb_score
-from sqlalchemy_zdb.types import ZdbColumn, ZdbScore, ZdbLiteral
-from sqlalchemy_zdb.operators import COMPARE_OPERATORS
+from sqlalchemy_zdb import zdb_raw_query, zdb_score, zdb_estimate_count
+from sqlalchemy_zdb.types import ZdbColumn, ZdbScore, ZdbLiteral, PATTERN_TYPE
+from sqlalchemy_zdb.operators import COMPARE_OPERATORS, compare
+from sqlalchemy_zdb.cache import LRUCache
+from sqlalchemy_zdb import instrumentation
+from sqlalchemy_zdb.aggregates import zdb_aggregate
+from sqlalchemy_zdb.explain import zdb_explain, zdb_dump_query
+
+# compiled zdb query templates, keyed on the shape of the clauses
+QUERY_CACHE = LRUCache(maxsize=512)
+
+# marks the position of a literal value in a template being built
+_SLOT = "\x00"
+_template = threading.local()
 
 
 def escape_tokens(inp):
@@ -32,6 +47,159 @@ def escape_tokens(inp):
     return inp
 
 
+def encode_string(value):
+    return "\"%s\"" % escape_tokens(value)
+
+
+def encode_quoted(value):
+    return "\"%s\"" % value
+
+
+def encode_pattern(value):
+    return "\"%s\"" % value.pattern
+
+
+def encode_prefix(value):
+    return "%s*" % escape_tokens(value)
+
+
+def encode_suffix(value):
+    return "*%s" % escape_tokens(value)
+
+
+def encode_infix(value):
+    return "*%s*" % escape_tokens(value)
+
+
+def encode_zdb_literal(value):
+    return value.literal
+
+
+def encode_plain(value):
+    return str(value)
+
+
+def encode_bool(value):
+    return "true" if value else "false"
+
+
+def encode_decimal(value):
+    # no exponent, 1E+2 is not a number to Elasticsearch
+    return "{:f}".format(value)
+
+
+def encode_date(value):
+    return "\"%s\"" % value.isoformat()
+
+
+def encode_datetime(value):
+    return "\"%s\"" % value.isoformat(sep=" ")
+
+
+# (python type, column type) -> encoder, column type None matches any
+LITERAL_ENCODERS = {
+    (str, None): encode_string,
+    (int, None): encode_plain,
+    (bool, None): encode_bool,
+    (float, None): encode_plain,
+    (decimal.Decimal, None): encode_decimal,
+    (datetime.date, None): encode_date,
+    (datetime.datetime, None): encode_datetime,
+    (uuid.UUID, None): encode_quoted,
+    (PATTERN_TYPE, None): encode_pattern,
+    (ZdbLiteral, None): encode_zdb_literal
+}
+
+
+def register_literal_encoder(python_type: type, encoder, column_type: type = None):
+    r"""Registers how values of ``python_type`` are written in a zdb query,
+    e.g. dates in the format of an index::
+
+        register_literal_encoder(datetime.date, lambda d: d.strftime("%Y%m%d"), Date)
+
+    :param encoder: callable returning the zdb syntax of a value
+    :param column_type: only use ``encoder`` for columns of this type
+        (or a subclass), for any column when ``None``
+    """
+    LITERAL_ENCODERS[(python_type, column_type)] = encoder
+    QUERY_CACHE.clear()
+
+
+def literal_encoder(value, column_type=None):
+    r"""Encoder registered for the type of ``value`` (or a base class),
+    one for the ``column_type`` it is compared with first.
+    :return: encoder or ``None``
+    """
+    column_types = type(column_type).__mro__ if column_type is not None else ()
+    for python_type in type(value).__mro__:
+        for _type in column_types:
+            encoder = LITERAL_ENCODERS.get((python_type, _type))
+            if encoder is not None:
+                return encoder
+        encoder = LITERAL_ENCODERS.get((python_type, None))
+        if encoder is not None:
+            return encoder
+    return None
+
+
+def encode_in_value(value, column_type=None):
+    if isinstance(value, str):
+        # values in a list are quoted, not escaped
+        return encode_quoted(value)
+    encoder = literal_encoder(value, column_type)
+    if encoder is None or isinstance(value, (PATTERN_TYPE, ZdbLiteral)):
+        raise Exception("Unsupported type for IN")
+    return encoder(value)
+
+
+def encode_in_list(values, column_type=None):
+    return "(%s)" % ",".join(encode_in_value(value, column_type) for value in values)
+
+
+def _in_value_encoder(column_type):
+    def encoder(value):
+        return encode_in_value(value, column_type)
+    return encoder
+
+
+def _in_list_encoder(column_type):
+    def encoder(values):
+        return encode_in_list(values, column_type)
+    return encoder
+
+
+def _literal_value(c):
+    if isinstance(c, TextClause):
+        return c.text
+    return c.value
+
+
+class _EncodedParam(TypeDecorator):
+    r"""Bind type that encodes a value into zdb query syntax
+    when the statement is executed."""
+    impl = String
+
+    def __init__(self, encoder):
+        super(_EncodedParam, self).__init__()
+        self.encoder = encoder
+
+    def process_bind_param(self, value, dialect):
+        return self.encoder(value)
+
+
+def compile_literal(c, encoder):
+    r"""Renders the value of a ``BindParameter`` or ``TextClause``
+    using ``encoder``. While a template is being built, a slot
+    marker is returned instead so the value can be substituted
+    on later calls with the same query shape.
+    """
+    slots = getattr(_template, "slots", None)
+    if slots is None:
+        return encoder(_literal_value(c))
+    slots.append((c, encoder))
+    return _SLOT
+
+
 def compile_binary_clause(c, compiler, tables, format_args):
     left = c.left
     right = c.right
@@ -44,11 +212,7 @@ def compile_binary_clause(c, compiler, tables, format_args):
         raise ValueError("Unsupported binary operator %s" % c.operator)
 
     tables.add(left.table.name)
-
-    if inspect.isfunction(_oper):
-        return _oper(left, right, c, compiler, tables, format_args)
-    else:
-        return '%s%s%s' % (left.name, _oper, compile_clause(right, compiler, tables, format_args))
+    return compare(_oper, left, right, c, compiler, tables, format_args)
 
 
 def compile_boolean_clause_list(c, compiler, tables, format_args):
@@ -67,40 +231,53 @@ def compile_boolean_clause_list(c, compiler, tables, format_args):
     return "(%s)" % _oper.join(query)
 
 
+def compile_unary_clause(c, compiler, tables, format_args):
+    if isinstance(c, AsBoolean):
+        # a boolean column, negated with ~
+        if not isinstance(c.element, AnnotatedColumn):
+            raise ValueError("Incorrect field")
+        tables.add(c.element.table.name)
+        return "%s:%s" % (c.element.name, "true" if c.operator == sqlalchemy.sql.operators.istrue else "false")
+    elif c.operator == operator.inv:
+        return "not %s" % compile_clause(c.element, compiler, tables, format_args)
+    raise ValueError("Unsupported unary operator %s" % c.operator)
+
+
 def compile_column_clause(c, compiler, tables, format_args):
     format_args.append("replace(%s, '\"', '')" % compiler.process(c))
-    return "\"%%s\""
+    # a literal % has to be doubled for the format/pyformat paramstyles
+    if compiler.preparer._double_percents:
+        return "\"%%s\""
+    return "\"%s\""
 
 
 def compile_grouping(c, compiler, tables, format_args):
+    if isinstance(c.element, (BooleanClauseList, BinaryExpression, UnaryExpression)):
+        # and_() nested in or_() or vice versa is already parenthesized,
+        # a single comparison needs no parentheses
+        return compile_clause(c.element, compiler, tables, format_args)
+
     sql = "(%s)"
     values = []
     for elem in c.element:
-        if isinstance(elem.value, str):
-            val = "\"%s\"" % elem.value
-        elif isinstance(elem.value, int):
-            val = str(elem.value)
-        else:
-            raise Exception("Unsupported type for IN")
-        values.append(val)
+        # raises for unsupported values while compiling, not on execute
+        encode_in_value(elem.value, elem.type)
+        values.append(compile_literal(elem, _in_value_encoder(elem.type)))
 
     return sql % ",".join(values)
 
 
-def compile_limit(offset: int, limit: int, order_by=None):
-    """
-    Compiles zdb order/limit/offset . Default
-    column to ORDER on is _score which represents
-    ES result relevance.
+def sort_keys(order_by):
+    r"""The keys of a zdb #limit ordering as a tuple, ``order_by``
+    being a single key, a list/tuple of them or ``None``"""
+    if order_by is None:
+        return ()
+    elif isinstance(order_by, (list, tuple)):
+        return tuple(order_by)
+    return order_by,
 
-        #limit(sort_field asc|desc, offset_val, limit_val)
-    """
-    if not isinstance(offset, int) or not isinstance(limit, int):
-        raise Exception("Expected int for zdb LIMIT offset and/or limit")
 
-    # dirty hack, UnaryExpression doesnt implement boolean clause comparison
-    if type(order_by) == type(None):
-        raise Exception("Expected UnaryExpression or ZdbScore for zdb LIMIT")
+def _compile_sort_key(order_by):
     if isinstance(order_by, ZdbScore):
         column_name = "_score"
         direction = order_by._zdb_direction
@@ -114,28 +291,51 @@ def compile_limit(offset: int, limit: int, order_by=None):
     else:
         raise Exception("Unexpected expression")
 
-    return "#limit(%s %s, %d, %d) " % (column_name, direction, offset, limit)
+    return "%s %s" % (column_name, direction)
+
+
+def compile_limit_sort(order_by):
+    r"""Compiles the ``sort_field asc|desc[, ...]`` part of a zdb #limit
+    :param order_by: ``ZdbScore`` or ``ZdbColumn.asc()/desc()``, or a
+        list of them to sort on several fields
+    """
+    keys = sort_keys(order_by)
+    if not keys:
+        raise Exception("Expected UnaryExpression or ZdbScore for zdb LIMIT")
+    return ", ".join(_compile_sort_key(key) for key in keys)
+
+
+def compile_limit(offset: int, limit: int, order_by=None):
+    """
+    Compiles zdb order/limit/offset . Default
+    column to ORDER on is _score which represents
+    ES result relevance.
+
+        #limit(sort_field asc|desc[, ...], offset_val, limit_val)
+    """
+    if not isinstance(offset, int) or not isinstance(limit, int):
+        raise Exception("Expected int for zdb LIMIT offset and/or limit")
+
+    return "#limit(%s, %d, %d) " % (compile_limit_sort(order_by), offset, limit)
 
 
 def compile_clause(c, compiler, tables, format_args):
-    if isinstance(c, BindParameter) and isinstance(c.value, (
-            str, int, re._pattern_type, ZdbLiteral)):
-        if isinstance(c.value, str):
-            return "\"%s\"" % escape_tokens(c.value)
-        elif isinstance(c.value, re._pattern_type):
-            return "\"%s\"" % c.value.pattern
-        elif isinstance(c.value, ZdbLiteral):
-            return c.value.literal
-        else:
-            return c.value
+    if isinstance(c, BindParameter) and getattr(c, "expanding", False):
+        # SQLAlchemy 1.4 renders in_() as one "expanding" parameter
+        encode_in_list(c.value, c.type)  # raises for unsupported values
+        return compile_literal(c, _in_list_encoder(c.type))
+    elif isinstance(c, BindParameter) and literal_encoder(c.value, c.type) is not None:
+        return compile_literal(c, literal_encoder(c.value, c.type))
     elif isinstance(c, (True_, False_)):
         return str(type(c) == True_).lower()
     elif isinstance(c, TextClause):
-        return c.text
+        return compile_literal(c, encode_plain)
     elif isinstance(c, BinaryExpression):
         return compile_binary_clause(c, compiler, tables, format_args)
     elif isinstance(c, BooleanClauseList):
         return compile_boolean_clause_list(c, compiler, tables, format_args)
+    elif isinstance(c, UnaryExpression) and c.operator is not None:
+        return compile_unary_clause(c, compiler, tables, format_args)
     elif isinstance(c, Column):
         return compile_column_clause(c, compiler, tables, format_args)
     elif isinstance(c, Grouping):
@@ -145,35 +345,150 @@ def compile_clause(c, compiler, tables, format_args):
     raise ValueError("Unsupported clause")
 
 
-@compiles(zdb_raw_query)
-def compile_zdb_query(element, compiler, **kw):
+class _Uncacheable(Exception):
+    pass
+
+
+def _clause_shape(c, literals):
+    if isinstance(c, BindParameter):
+        if isinstance(c.value, DeclarativeMeta):
+            return "table", c.value.__tablename__
+        if getattr(c, "expanding", False):
+            literals.append(c)
+            return "literal", list
+        if literal_encoder(c.value, c.type) is None:
+            raise _Uncacheable()
+        literals.append(c)
+        return "literal", type(c.value), type(c.type)
+    elif isinstance(c, TextClause):
+        literals.append(c)
+        return "text",
+    elif isinstance(c, (True_, False_, Null)):
+        return type(c),
+    elif isinstance(c, BinaryExpression):
+        if not isinstance(c.left, AnnotatedColumn):
+            raise _Uncacheable()
+        return ("binary", c.left.table.name, c.left.name, c.operator,
+                _clause_shape(c.right, literals))
+    elif isinstance(c, BooleanClauseList):
+        return ("boolean", c.operator,
+                tuple(_clause_shape(_c, literals) for _c in c.clauses))
+    elif isinstance(c, Grouping):
+        return "grouping", _clause_shape(c.element, literals)
+    elif isinstance(c, UnaryExpression) and c.operator is not None:
+        return "unary", c.operator, _clause_shape(c.element, literals)
+    elif isinstance(c, ClauseList):
+        return "list", tuple(_clause_shape(_c, literals) for _c in c.clauses)
+    elif isinstance(c, Column):
+        return "column", getattr(c.table, "name", None), c.name
+    raise _Uncacheable()
+
+
+def _clauses_shape(element):
+    literals = []
+    try:
+        return tuple(_clause_shape(c, literals) for c in element.clauses), literals
+    except _Uncacheable:
+        return None, None
+
+
+def _literal_key(c):
+    value = _literal_value(c)
+    if isinstance(value, list):
+        return tuple(value)
+    elif isinstance(value, ZdbLiteral):
+        return ZdbLiteral, value.literal
+    return value
+
+
+def zdb_cache_key(element):
+    r"""Part of the SQLAlchemy statement cache key of a zdb function
+    that its bound parameters don't cover: the shape of its clauses
+    and, unless the query is bound, the literal values that are
+    rendered into the SQL text.
+
+    :return: a hashable tuple, or ``None`` when the element can not
+        be cached
+    """
+    clauses, literals = _clauses_shape(element)
+    if clauses is None:
+        return None
+    if getattr(element, "_zdb_bind_query", False):
+        return clauses
+    return clauses, tuple(_literal_key(c) for c in literals)
+
+
+def zdb_query_shape(element, compiler):
+    r"""Cache key for the structure of a ``zdb_raw_query``:
+    tables, columns, operators, nesting and literal types, but
+    not the literal values themselves.
+
+    :return: ``(key, literals)`` where ``literals`` lists the value
+        carrying clauses in a stable order, or ``(None, None)`` when
+        the clauses can not be cached.
+    """
+    clauses, literals = _clauses_shape(element)
+    if clauses is None:
+        return None, None
+
+    order_by = []
+    for key in sort_keys(getattr(element, "_zdb_order_by", None)):
+        if isinstance(key, ZdbScore):
+            order_by.append(("_score", key._zdb_direction))
+        elif isinstance(key, UnaryExpression):
+            column = next(iter(key.element.base_columns))
+            order_by.append((column.table.name, column.name, key.modifier))
+        else:
+            order_by.append(None)
+    order_by = tuple(order_by)
+
+    return (compiler.dialect.name, compiler.dialect.paramstyle, clauses, order_by), literals
+
+
+def _compile_template(element, compiler, literals):
+    r"""Compiles the clauses of a ``zdb_raw_query`` into a template:
+
+        (table, segments, slots, format_args)
+
+    where ``segments`` are the static parts of the query string and
+    ``slots`` the ``(literal_index, encoder)`` pairs in between them.
+
+    :return: ``(template, cacheable)``
+    """
     query = []
     tables = set()
     format_args = []
-    limit = ""
-
-    for i, c in enumerate(element.clauses):
-        add_to_query = True
 
-        if isinstance(c, BinaryExpression):
-            tables.add(c.left.table.name)
-        elif isinstance(c, BindParameter):
-            if isinstance(c.value, str):
+    _template.slots = [] if literals is not None else None
+    try:
+        for i, c in enumerate(element.clauses):
+            add_to_query = True
+            if isinstance(c, Grouping):
+                # parenthesized as a function argument, e.g. startswith()
+                c = c.element
+
+            if isinstance(c, BinaryExpression):
+                tables.add(c.left.table.name)
+            elif isinstance(c, BindParameter):
+                if isinstance(c.value, str):
+                    pass
+                elif isinstance(c.value, DeclarativeMeta):
+                    if i > 0:
+                        raise ValueError("Table can be specified only as first param")
+                    tables.add(c.value.__tablename__)
+                    add_to_query = False
+            elif isinstance(c, (BooleanClauseList, UnaryExpression)):
                 pass
-            elif isinstance(c.value, DeclarativeMeta):
-                if i > 0:
-                    raise ValueError("Table can be specified only as first param")
-                tables.add(c.value.__tablename__)
-                add_to_query = False
-        elif isinstance(c, BooleanClauseList):
-            pass
-        elif isinstance(c, Column):
-            pass
-        else:
-            raise ValueError("Unsupported filter")
+            elif isinstance(c, Column):
+                pass
+            else:
+                raise ValueError("Unsupported filter")
 
-        if add_to_query:
-            query.append(compile_clause(c, compiler, tables, format_args))
+            if add_to_query:
+                query.append(compile_clause(c, compiler, tables, format_args))
+        slots = _template.slots
+    finally:
+        _template.slots = None
 
     if not tables:
         raise ValueError("No filters passed")
@@ -182,23 +497,195 @@ def compile_zdb_query(element, compiler, **kw):
     else:
         table = tables.pop()
 
-    if hasattr(element, "_zdb_order_by") and isinstance(element._zdb_order_by, (UnaryExpression, ZdbScore)):
+    query = " and ".join(query)
+    if slots is None:
+        return (table, (query,), (), format_args), False
+
+    segments = tuple(query.split(_SLOT))
+    index = {id(c): i for i, c in enumerate(literals)}
+
+    # values rendered without going through compile_literal() ended up
+    # in the static segments, such a template can not be reused
+    if set(index.get(id(c)) for c, _ in slots) != set(range(len(literals))):
+        query = _render_template(segments,
+                                 tuple((i, encoder) for i, (_, encoder) in enumerate(slots)),
+                                 [c for c, _ in slots])
+        return (table, (query,), (), format_args), False
+
+    slots = tuple((index[id(c)], encoder) for c, encoder in slots)
+    return (table, segments, slots, format_args), True
+
+
+def _render_template(segments, slots, literals):
+    if not slots:
+        return segments[0]
+
+    rtn = [segments[0]]
+    for (i, encoder), segment in zip(slots, segments[1:]):
+        rtn.append(encoder(_literal_value(literals[i])))
+        rtn.append(segment)
+    return "".join(rtn)
+
+
+def _sql_string(value):
+    return "\'%s\'" % value.replace("\'", "\'\'")
+
+
+def _bind_template(segments, slots, literals, compiler, limit=None):
+    r"""Compiles a template into a SQL string concatenation where each
+    literal value is a bound parameter, e.g.::
+
+        'author:' || %(author_1)s || ' and price > ' || %(price_1)s
+
+    The SQL text only depends on the query shape, so Postgres can
+    reuse plans and pg_stat_statements groups the searches.
+    """
+    parts = []
+    if limit is not None:
+        offset, limit, order_by = limit
+        if not isinstance(offset, int) or not isinstance(limit, int):
+            raise Exception("Expected int for zdb LIMIT offset and/or limit")
+        parts.append("#limit(%s, " % compile_limit_sort(order_by))
+        parts.append(bindparam("zdb_offset", offset, type_=_EncodedParam(encode_plain), unique=True))
+        parts.append(", ")
+        parts.append(bindparam("zdb_limit", limit, type_=_EncodedParam(encode_plain), unique=True))
+        parts.append(") ")
+
+    if not slots:
+        # nothing to substitute, the whole query is one parameter
+        query = segments[0]
+        if compiler.preparer._double_percents:
+            query = query.replace("%%", "%")
+        parts.append(bindparam("zdb_query", query, type_=String, unique=True))
+        segments = ()
+
+    for n, segment in enumerate(segments):
+        parts.append(segment)
+        if n < len(slots):
+            i, encoder = slots[n]
+            c = literals[i]
+            if isinstance(c, BindParameter):
+                c = c._clone()
+                c.type = _EncodedParam(encoder)
+                c.expanding = False
+            else:
+                c = bindparam(None, _literal_value(c), type_=_EncodedParam(encoder), unique=True)
+            parts.append(c)
+
+    sql = []
+    for part in parts:
+        if not isinstance(part, str):
+            sql.append(compiler.process(part))
+        elif not part:
+            continue
+        elif sql and isinstance(sql[-1], list):
+            sql[-1].append(part)
+        else:
+            sql.append([part])
+    sql = [_sql_string("".join(part)) if isinstance(part, list) else part for part in sql]
+    return " || ".join(sql) if sql else _sql_string("")
+
+
+def compile_zdb_query_text(element, compiler):
+    r"""Compiles a ``zdb_raw_query`` into the table it searches and
+    the SQL expression of its ZomboDB query string.
+    :return: ``(table, sql)``
+    """
+    table, query, _ = _compile_zdb_query_text(element, compiler)
+    return table, query
+
+
+def _compile_zdb_query_text(element, compiler):
+    # (table, sql, shape), shape being the query with its literals as ?
+    limit = ""
+
+    key, literals = zdb_query_shape(element, compiler)
+    template = QUERY_CACHE.get(key) if key is not None else None
+    if template is None:
+        template, cacheable = _compile_template(element, compiler, literals)
+        if cacheable:
+            QUERY_CACHE.set(key, template)
+    table, segments, slots, format_args = template
+    shape = "?".join(segments)
+
+    has_limit = bool(sort_keys(getattr(element, "_zdb_order_by", None)))
+
+    if getattr(element, "_zdb_bind_query", False):
+        query = _bind_template(segments, slots, literals, compiler, limit=(
+            element._zdb_offset, element._zdb_limit, element._zdb_order_by) if has_limit else None)
+        if format_args and isinstance(format_args, list):
+            return table, "format(%s, %s)" % (query, ", ".join(format_args)), shape
+        return table, "(%s)" % query, shape
+
+    query = _render_template(segments, slots, literals)
+
+    if has_limit:
         limit = compile_limit(order_by=element._zdb_order_by,
                               offset=element._zdb_offset,
                               limit=element._zdb_limit)
 
-    sql = "zdb(\'%s\', ctid) ==> " % table
     if format_args and isinstance(format_args, list):
-        sql += "\'%sformat(\'%s\', %s)\'" % (
+        return table, "\'%sformat(\'%s\', %s)\'" % (
             limit,
-            " and ".join(query),
+            query,
             ", ".join(format_args)
-        )
+        ), shape
+    return table, "\'%s%s\'" % (limit, query), shape
+
+
+@compiles(zdb_raw_query)
+def compile_zdb_query(element, compiler, **kw):
+    if not instrumentation._listeners:
+        return "zdb(\'%s\', ctid) ==> %s" % compile_zdb_query_text(element, compiler)
+
+    instrumentation.dispatch("before_compile")
+    start = time.time()
+    table, query, shape = _compile_zdb_query_text(element, compiler)
+    instrumentation.compiled(table, query, shape, time.time() - start)
+    return "zdb(\'%s\', ctid) ==> %s" % (table, query)
+
+
+@compiles(zdb_estimate_count)
+def compile_zdb_estimate_count(element, compiler, **kw):
+    clauses = list(element.clauses)
+    if len(clauses) != 1 or not isinstance(clauses[0], zdb_raw_query):
+        raise ValueError("Expected a zdb_raw_query")
+
+    return "zdb_estimate_count(\'%s\', %s)" % compile_zdb_query_text(clauses[0], compiler)
+
+
+@compiles(zdb_dump_query)
+def compile_zdb_dump_query(element, compiler, **kw):
+    clauses = list(element.clauses)
+    if len(clauses) != 1 or not isinstance(clauses[0], zdb_raw_query):
+        raise ValueError("Expected a zdb_raw_query")
+
+    return "zdb_dump_query(\'%s\', %s)" % compile_zdb_query_text(clauses[0], compiler)
+
+
+@compiles(zdb_explain)
+def compile_zdb_explain(element, compiler, **kw):
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return "EXPLAIN (%s) %s" % (options, compiler.process(element.statement, **kw))
+
+
+@compiles(zdb_aggregate)
+def compile_zdb_aggregate(element, compiler, **kw):
+    aggregate = element._zdb_aggregate
+    table = aggregate.column.table.name
+
+    clauses = list(element.clauses)
+    if not clauses:
+        query = "\'\'"
+    elif len(clauses) == 1 and isinstance(clauses[0], zdb_raw_query):
+        _table, query = compile_zdb_query_text(clauses[0], compiler)
+        if _table != table:
+            raise ValueError("Different tables passed")
     else:
-        sql += "\'%s%s\'" % (
-            limit,
-            " and ".join(query))
-    return sql
+        raise ValueError("Expected a zdb_raw_query")
+
+    return "(SELECT json_agg(_agg) FROM %s(%s) AS _agg)" % (
+        aggregate.function, ", ".join(aggregate.arguments("\'%s\'" % table, query, compiler)))
 
 
 @compiles(zdb_score)
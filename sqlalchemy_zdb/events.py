@@ -1,39 +1,114 @@
+import weakref
+
 from sqlalchemy import event, DDL
-from sqlalchemy_zdb.utils import get_zdb_columns_as_ddl, has_type, has_index, verify_type, verify_index
+from sqlalchemy.orm import Mapper
+from sqlalchemy_zdb.utils import (
+    get_zdb_columns_as_ddl, get_zdb_index_name, get_zdb_type_name, get_catalog_snapshot,
+    get_zdb_index_options, get_index_options_as_ddl, has_type, has_index, verify_type, verify_index)
 
 
-def before_create(model):
-    type_name = "type_%s" % model.name.lower()
-    event.listen(
-        model,
-        "before_create",
-        DDL("""
+@event.listens_for(Mapper, "instrument_class")
+def zdb_model_options(mapper, class_):
+    r"""Copies ``__zdb_options__`` of a declarative model into the
+    ``info`` of its table, where the index DDL picks them up:
+
+        class Products(base):
+            __tablename__ = "products"
+            __zdb_options__ = {"shards": 5, "replicas": 1, "refresh_interval": "5s"}
+    """
+    options = getattr(class_, "__zdb_options__", None)
+    if options is not None and mapper.local_table is not None:
+        mapper.local_table.info["zdb_options"] = dict(options)
+
+
+def _catalog(connection, runner=None):
+    # snapshot taken by the metadata events of the create_all() run
+    # executing ``runner``, a snapshot left by a failed run is ignored
+    taken = connection.info.get("zdb_catalog")
+    if taken is None or runner is None or taken[0]() is not runner:
+        return None
+    return taken[1]
+
+
+def _type_missing(type_name, connection, runner=None):
+    catalog = _catalog(connection, runner)
+    if catalog is None:
+        return not has_type(type_name, connection=connection)
+    return type_name not in catalog["types"]
+
+
+def _index_missing(table_name, index_name, connection, runner=None):
+    catalog = _catalog(connection, runner)
+    if catalog is None:
+        return not has_index(table_name=table_name, index_name=index_name, connection=connection)
+    return (table_name, index_name) not in catalog["indexes"]
+
+
+def catalog_snapshot(metadata):
+    r"""Takes one catalog snapshot per ``create_all()`` run instead
+    of a ``has_type``/``has_index`` query per table. Registers its
+    listeners once per ``MetaData``."""
+    if metadata.info.get("zdb_catalog_events"):
+        return
+    metadata.info["zdb_catalog_events"] = True
+
+    @event.listens_for(metadata, "before_create")
+    def _take_snapshot(target, connection, _ddl_runner=None, **kw):
+        # keyed on the run, as after_create is skipped when a run fails
+        if _ddl_runner is not None:
+            connection.info["zdb_catalog"] = (weakref.ref(_ddl_runner), get_catalog_snapshot(connection))
+
+    @event.listens_for(metadata, "after_create")
+    def _drop_snapshot(target, connection, **kw):
+        connection.info.pop("zdb_catalog", None)
+
+
+def get_zdb_type_ddl(model):
+    r"""``CREATE TYPE`` of the composite type a ZomboDB index is built on"""
+    return """
             CREATE TYPE %s AS (%s);
-            """ % (type_name, get_zdb_columns_as_ddl(model))
-        ).execute_if(
-            callable_=lambda *args, **kwargs:  not has_type(type_name, connection=args[2])
-        )
-    )
+            """ % (get_zdb_type_name(model), get_zdb_columns_as_ddl(model))
 
 
-def after_create(model):
-    from sqlalchemy_zdb import ES_HOST, ZdbColumn
+def get_zdb_index_ddl(model, concurrently: bool = False):
+    r"""``CREATE INDEX`` of the ZomboDB index of a table
+    :param concurrently: build without locking out writes, can not
+        run inside a transaction
+    """
+    from sqlalchemy_zdb import ZdbColumn
     table_name = model.name
-    index_name = "idx_zdb_%s" % table_name.lower()
-    type_name = "type_%s" % table_name.lower()
-    event.listen(
-        model,
-        "after_create",
-        DDL("""
-            CREATE INDEX %s ON %s
+    return """
+            CREATE INDEX %s%s ON %s
             USING zombodb(
                 zdb('%s', ctid),
                 zdb(ROW(%s)::%s))
-            WITH (url='%s');
-        """ % (index_name, table_name, table_name,
+            WITH (%s);
+        """ % ("CONCURRENTLY " if concurrently else "", get_zdb_index_name(model), table_name, table_name,
                ", ".join([column.name for column in model.columns if isinstance(column, ZdbColumn)]),
-               type_name, ES_HOST)
-        ).execute_if(
-            callable_=lambda *args, **kwargs: not has_index(table_name=table_name, index_name=index_name, connection=args[2])
-        )
-    )
+               get_zdb_type_name(model), get_index_options_as_ddl(get_zdb_index_options(model)))
+
+
+def before_create(model):
+    if model.info.get("zdb_before_create"):
+        return
+    model.info["zdb_before_create"] = True
+
+    @event.listens_for(model, "before_create")
+    def _create_type(target, connection, _ddl_runner=None, **kw):
+        # the DDL is built when it runs, picking up later changes
+        if _type_missing(get_zdb_type_name(model), connection, _ddl_runner):
+            connection.execute(DDL(get_zdb_type_ddl(model)))
+
+
+def after_create(model):
+    if model.info.get("zdb_after_create"):
+        return
+    model.info["zdb_after_create"] = True
+
+    @event.listens_for(model, "after_create")
+    def _create_index(target, connection, _ddl_runner=None, **kw):
+        # the DDL is built when it runs, with the current zdb_options
+        if model.metadata.info.get("zdb_skip_indexes"):
+            return
+        if _index_missing(model.name, get_zdb_index_name(model), connection, _ddl_runner):
+            connection.execute(DDL(get_zdb_index_ddl(model)))
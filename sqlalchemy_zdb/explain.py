@@ -0,0 +1,90 @@
+import json
+from collections import namedtuple
+
+from sqlalchemy import Text
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.expression import FunctionElement
+
+ZdbExplain = namedtuple("ZdbExplain", ["plan", "es_query", "zdb_predicates", "sql_predicates", "timing"])
+
+
+class zdb_explain(Executable, ClauseElement):
+    r"""``EXPLAIN (FORMAT JSON)`` of a statement, with ``ANALYZE``
+    and ``BUFFERS`` when ``analyze`` is set."""
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+class zdb_dump_query(FunctionElement):
+    r"""Elasticsearch query DSL ZomboDB builds from a ``zdb_raw_query``"""
+    name = 'zdb_dump_query'
+    type = Text()
+    inherit_cache = True
+
+    @property
+    def _from_objects(self):
+        return []
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        for _node in _walk(child):
+            yield _node
+
+
+def _node_time(node):
+    return node.get("Actual Total Time", 0.0) * node.get("Actual Loops", 1)
+
+
+def plan_timing(plan: dict, index_name: str):
+    r"""Splits the time of an ``EXPLAIN ANALYZE`` between the scan of
+    the ZomboDB index (Elasticsearch) and fetching rows from the heap.
+
+    ``rows_removed_by_filter`` and ``rows_removed_by_recheck`` count
+    rows returned by Elasticsearch but thrown away by Postgres, a
+    sign of predicates that could not be pushed down.
+    """
+    timing = {
+        "planning": plan.get("Planning Time"),
+        "execution": plan.get("Execution Time"),
+        "index_scan": 0.0,
+        "heap_fetch": 0.0,
+        "rows_removed_by_filter": 0,
+        "rows_removed_by_recheck": 0
+    }
+    for node in _walk(plan["Plan"]):
+        if node.get("Index Name") != index_name:
+            continue
+        # a plain Index Scan also fetches the heap rows itself
+        timing["index_scan"] += _node_time(node)
+        timing["rows_removed_by_filter"] += node.get("Rows Removed by Filter", 0)
+
+    for node in _walk(plan["Plan"]):
+        if node["Node Type"] != "Bitmap Heap Scan":
+            continue
+        children = [child for child in node.get("Plans", []) if child.get("Index Name") == index_name]
+        if children:
+            timing["heap_fetch"] += _node_time(node) - sum(_node_time(child) for child in children)
+            timing["rows_removed_by_filter"] += node.get("Rows Removed by Filter", 0)
+            timing["rows_removed_by_recheck"] += node.get("Rows Removed by Index Recheck", 0)
+    return timing
+
+
+def parse_plan(value):
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value[0] if isinstance(value, list) else value
+
+
+def parse_es_query(value):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
@@ -0,0 +1,104 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import DDL, MetaData
+
+from sqlalchemy_zdb.events import get_zdb_type_ddl, get_zdb_index_ddl
+from sqlalchemy_zdb.utils import (
+    is_zdb_table, get_catalog_snapshot, get_zdb_index_name, get_zdb_type_name,
+    get_zdb_index_options, get_index_options, set_index_options, format_index_option)
+
+IndexBuildResult = namedtuple("IndexBuildResult", ["table", "index", "seconds", "error"])
+
+
+def _build_index(engine, table, concurrently):
+    index_name = get_zdb_index_name(table)
+    start = time.time()
+    try:
+        # CREATE INDEX CONCURRENTLY can not run inside a transaction
+        with engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            connection.execute(DDL(get_zdb_index_ddl(table, concurrently=concurrently)))
+    except Exception as e:
+        return IndexBuildResult(table.name, index_name, time.time() - start, e)
+    return IndexBuildResult(table.name, index_name, time.time() - start, None)
+
+
+def build_indexes(metadata, engine, workers: int = 4, concurrently: bool = False, progress=None):
+    r"""Builds the ZomboDB indexes of all tables in ``metadata``
+    concurrently, each on a connection of its own, instead of one
+    after another inside ``create_all()``.
+
+        base.metadata.create_all(engine, zdb_indexes=False)
+        results = build_indexes(base.metadata, engine, workers=8, progress=print)
+        failed = [r for r in results if r.error]
+
+    The composite types are created first, in one transaction.
+    Indexes (and types) that already exist are skipped.
+
+    :param metadata: ``sqlalchemy.MetaData``, its tables need to exist
+    :param engine: ``sqlalchemy.engine.Engine``, its pool should allow
+        ``workers`` connections
+    :param workers: number of indexes built at the same time
+    :param concurrently: use ``CREATE INDEX CONCURRENTLY``
+    :param progress: called with an ``IndexBuildResult`` whenever an index is done
+    :return: list of ``IndexBuildResult``, ``error`` holds the exception
+        of a failed index build
+    """
+    tables = [table for table in metadata.sorted_tables if is_zdb_table(table)]
+
+    with engine.begin() as connection:
+        catalog = get_catalog_snapshot(connection)
+        for table in tables:
+            if get_zdb_type_name(table) not in catalog["types"]:
+                connection.execute(DDL(get_zdb_type_ddl(table)))
+
+    tables = [table for table in tables
+              if (table.name, get_zdb_index_name(table)) not in catalog["indexes"]]
+    if not tables:
+        return []
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_build_index, engine, table, concurrently) for table in tables]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def sync_index_options(target, connection, reset: bool = True):
+    r"""Applies changed ``__zdb_options__`` to existing ZomboDB
+    indexes through ``ALTER INDEX ... SET/RESET``, without a rebuild.
+
+        sync_index_options(base.metadata, connection)
+        {'products': {'replicas': '2', 'refresh_interval': None}}
+
+    Note that Elasticsearch can not change some settings, like the
+    number of shards, of an existing index.
+
+    :param target: ``sqlalchemy.MetaData`` or ``sqlalchemy.Table``
+    :param connection: ``sqlalchemy.engine.Connection``
+    :param reset: RESET options set on the index but not on the model
+    :return: dict of table name to the changed options, None means RESET
+    """
+    tables = target.sorted_tables if isinstance(target, MetaData) else [target]
+
+    rtn = {}
+    for table in tables:
+        if not is_zdb_table(table):
+            continue
+        index_name = get_zdb_index_name(table)
+        current = get_index_options(index_name, connection)
+        wanted = {k: format_index_option(v) for k, v in get_zdb_index_options(table).items()}
+
+        changes = {k: v for k, v in wanted.items() if current.get(k) != v}
+        if reset:
+            changes.update({k: None for k in current if k not in wanted})
+        if changes:
+            set_index_options(index_name, changes, connection)
+            rtn[table.name] = changes
+    return rtn
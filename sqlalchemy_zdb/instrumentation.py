@@ -0,0 +1,194 @@
+import json
+import time
+import threading
+from collections import namedtuple
+
+ZdbEvent = namedtuple("ZdbEvent", ["name", "table", "query", "shape", "rows", "seconds"])
+
+EVENTS = ("before_compile", "after_compile", "before_execute", "after_execute", "after_hydrate")
+
+# event name -> callbacks, empty while instrumentation is disabled
+_listeners = {}
+_lock = threading.Lock()
+
+# zdb query compiled last on this thread, for the execute events
+_current = threading.local()
+
+
+def listen(name: str, fn):
+    r"""Calls ``fn(ZdbEvent)`` on an event of ``ZdbQuery``:
+
+    - ``before_compile``/``after_compile``: compiling a zdb query string,
+      ``after_compile`` carries the ``table``, ``query`` and ``shape``
+    - ``before_execute``/``after_execute``: running the SQL statement
+    - ``after_hydrate``: fetching rows and building the result objects,
+      ``rows`` holds the number of rows
+
+    ``seconds`` is set on the ``after_*`` events. While nothing
+    listens, instrumentation costs one dict lookup per query.
+    """
+    if name not in EVENTS:
+        raise Exception("Unknown event %s" % name)
+    with _lock:
+        _listeners.setdefault(name, []).append(fn)
+
+
+def remove(name: str, fn):
+    with _lock:
+        fns = [f for f in _listeners.get(name, []) if f != fn]
+        if fns:
+            _listeners[name] = fns
+        else:
+            _listeners.pop(name, None)
+
+
+def dispatch(name: str, table=None, query=None, shape=None, rows=None, seconds=None):
+    fns = _listeners.get(name)
+    if fns:
+        event = ZdbEvent(name, table, query, shape, rows, seconds)
+        for fn in fns:
+            fn(event)
+
+
+def compiled(table: str, query: str, shape: str, seconds: float):
+    _current.compiled = (table, query, shape)
+    dispatch("after_compile", table=table, query=query, shape=shape, seconds=seconds)
+
+
+def instrument_iter(execute):
+    r"""Runs ``execute()`` (``Query.__iter__``) and iterates its result
+    while emitting the execute and hydrate events."""
+    _current.compiled = None
+    dispatch("before_execute")
+    start = time.time()
+    result = execute()
+    seconds = time.time() - start
+
+    table, query, shape = getattr(_current, "compiled", None) or (None, None, None)
+    dispatch("after_execute", table=table, query=query, shape=shape, seconds=seconds)
+    return _hydrate(result, table, query, shape)
+
+
+def _hydrate(result, table, query, shape):
+    rows = 0
+    seconds = 0.0
+    try:
+        while True:
+            start = time.time()
+            try:
+                row = next(result)
+            except StopIteration:
+                seconds += time.time() - start
+                break
+            seconds += time.time() - start
+            rows += 1
+            yield row
+    finally:
+        dispatch("after_hydrate", table=table, query=query, shape=shape, rows=rows, seconds=seconds)
+
+
+class Histogram(object):
+    r"""Cumulative histogram of durations, like a Prometheus histogram"""
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple = None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[i] += 1
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.counts)}
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class ZdbStats(object):
+    r"""Collects compile, execute and hydrate timings per query shape,
+    which is the zdb query with its literal values left out.
+
+        stats = ZdbStats()
+        stats.enable()
+        ...
+        print(stats.to_prometheus())
+
+    :param buckets: upper bounds of the histogram buckets in seconds
+    """
+    PHASES = {"after_compile": "compile", "after_execute": "execute", "after_hydrate": "hydrate"}
+
+    def __init__(self, buckets: tuple = None):
+        self.buckets = buckets
+        self.histograms = {}
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        for name in self.PHASES:
+            listen(name, self.observe)
+        return self
+
+    def disable(self):
+        for name in self.PHASES:
+            remove(name, self.observe)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.rows = {}
+
+    def observe(self, event: ZdbEvent):
+        key = (event.table or "", event.shape or "", self.PHASES[event.name])
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(event.seconds)
+            if event.rows is not None:
+                self.rows[key[:2]] = self.rows.get(key[:2], 0) + event.rows
+
+    def as_dict(self):
+        rtn = []
+        with self._lock:
+            for (table, shape, phase), histogram in sorted(self.histograms.items()):
+                item = {"table": table, "shape": shape, "phase": phase}
+                item.update(histogram.as_dict())
+                if phase == "hydrate":
+                    item["rows"] = self.rows.get((table, shape), 0)
+                rtn.append(item)
+        return rtn
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def to_prometheus(self, name: str = "zdb_query"):
+        r"""Text exposition format, one histogram ``<name>_seconds``
+        labeled with table, shape and phase, plus ``<name>_rows_total``"""
+        lines = ["# TYPE %s_seconds histogram" % name]
+        for item in self.as_dict():
+            labels = 'table="%s",shape="%s",phase="%s"' % (
+                _label(item["table"]), _label(item["shape"]), item["phase"])
+            for bucket, count in item["buckets"].items():
+                lines.append('%s_seconds_bucket{%s,le="%s"} %d' % (name, labels, bucket, count))
+            lines.append('%s_seconds_bucket{%s,le="+Inf"} %d' % (name, labels, item["count"]))
+            lines.append("%s_seconds_sum{%s} %f" % (name, labels, item["sum"]))
+            lines.append("%s_seconds_count{%s} %d" % (name, labels, item["count"]))
+
+        lines.append("# TYPE %s_rows_total counter" % name)
+        for item in self.as_dict():
+            if item["phase"] == "hydrate":
+                lines.append('%s_rows_total{table="%s",shape="%s"} %d' % (
+                    name, _label(item["table"]), _label(item["shape"]), item["rows"]))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, text
+from sqlalchemy.orm.query import Query
+
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.types import ZdbScore
+
+ZdbSearchHit = namedtuple("ZdbSearchHit", ["score", "table", "entity"])
+
+
+class ZdbMultiSearch(object):
+    r"""Runs several ``ZdbQuery``'s, usually on different tables,
+    concurrently and merges their results on ``zdb_score()``.
+
+        search = ZdbMultiSearch(sessionmaker(bind=engine))
+        search.add(ZdbQuery(Products, session=s).filter(Products.name == "box"))
+        search.add(ZdbQuery(Reviews, session=s).filter(Reviews.body == "box"), boost=0.5)
+        hits = search.execute(limit=20)
+
+    Every query runs on a session of its own, so on a connection of
+    its own, and the total time is about that of the slowest query.
+
+    :param session_factory: callable returning a new ``Session``
+        (``sessionmaker``), or an ``AsyncSession`` for ``execute_async()``
+    :param max_workers: threads used by ``execute()``, one per query by default
+    """
+    def __init__(self, session_factory, max_workers: int = None):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self._searches = []
+
+    def add(self, query: ZdbQuery, boost: float = 1.0):
+        r"""Adds a query to the search
+        :param query: ``ZdbQuery`` with at least one filter on a ``ZdbColumn``
+        :param boost: factor the scores of this query are multiplied with
+        """
+        if not isinstance(query, ZdbQuery):
+            raise Exception("Expected ZdbQuery")
+        exprs = query._zdb_exprs()
+        if not exprs["zdb"]:
+            raise Exception("ZdbMultiSearch requires a filter on a ZdbColumn")
+        self._searches.append((query, boost))
+        return self
+
+    @staticmethod
+    def _zdb_search_query(query: ZdbQuery, limit: int = None):
+        if limit is not None and not query._zdb_data["order"] and query._zdb_data["limit"] is None:
+            # let every index return its own top hits only
+            query = query.order_by(ZdbScore("desc")).limit(limit)
+        q = query._zdb_make_query()
+
+        table = q.selectable.froms[0].name
+        score = func.zdb_score(table, text("ctid")).label("zdb_score")
+        return table, Query.add_columns(q, score)
+
+    @staticmethod
+    def _zdb_hits(table, rows, boost):
+        hits = []
+        for row in rows:
+            entity = row[0] if len(row) == 2 else tuple(row[:-1])
+            hits.append(ZdbSearchHit((row[-1] or 0.0) * boost, table, entity))
+        return hits
+
+    @staticmethod
+    def _zdb_merge(results, limit):
+        hits = sorted((hit for hits in results for hit in hits),
+                      key=lambda hit: hit.score, reverse=True)
+        return hits[:limit] if limit is not None else hits
+
+    def _zdb_run(self, query, boost, limit):
+        table, q = self._zdb_search_query(query, limit)
+        session = self.session_factory()
+        try:
+            return self._zdb_hits(table, q.with_session(session).all(), boost)
+        finally:
+            session.close()
+
+    def execute(self, limit: int = None):
+        r"""Runs all queries on a thread pool.
+
+        The returned entities are detached from the sessions they
+        were loaded with, use ``Session.merge()`` to attach them.
+
+        :param limit: maximum number of hits returned
+        :return: list of ``ZdbSearchHit`` ordered by boosted score
+        """
+        if not self._searches:
+            return []
+
+        workers = self.max_workers or len(self._searches)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._zdb_run, query, boost, limit)
+                       for query, boost in self._searches]
+            results = [future.result() for future in futures]
+        return self._zdb_merge(results, limit)
+
+    async def execute_async(self, limit: int = None):
+        r"""Runs all queries concurrently on the running event loop,
+        ``session_factory`` must return an ``AsyncSession``.
+
+        :param limit: maximum number of hits returned
+        :return: list of ``ZdbSearchHit`` ordered by boosted score
+        """
+        import asyncio
+
+        async def run(query, boost):
+            table, q = self._zdb_search_query(query, limit)
+            session = self.session_factory()
+            try:
+                rows = (await session.execute(q.statement)).all()
+            finally:
+                await session.close()
+            return self._zdb_hits(table, rows, boost)
+
+        results = await asyncio.gather(*[run(query, boost) for query, boost in self._searches])
+        return self._zdb_merge(results, limit)
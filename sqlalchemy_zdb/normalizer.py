@@ -0,0 +1,259 @@
+import datetime
+import decimal
+import operator
+
+from sqlalchemy import Column, and_, or_, not_
+from sqlalchemy.sql.elements import (
+    BinaryExpression, BindParameter, BooleanClauseList, ClauseList, Grouping, Null, True_, False_,
+    UnaryExpression)
+from sqlalchemy.sql.operators import between_op
+
+from sqlalchemy_zdb.types import ZdbLiteral
+from sqlalchemy_zdb.operators import RANGE_TYPES
+
+LOWER_OPERATORS = (operator.gt, operator.ge)
+UPPER_OPERATORS = (operator.lt, operator.le)
+
+
+def _value_key(c):
+    if isinstance(c, Grouping):
+        return _value_key(c.element)
+    elif isinstance(c, ClauseList):
+        keys = tuple(_value_key(_c) for _c in c.clauses)
+        return None if None in keys else keys
+    elif isinstance(c, BindParameter):
+        value = c.value
+        if isinstance(value, ZdbLiteral):
+            value = value.literal
+        return type(c.value).__name__, repr(value)
+    elif isinstance(c, (Null, True_, False_)):
+        return type(c).__name__,
+    return None
+
+
+def _operator_key(op):
+    # every custom_op(), from column.op("~"), is named "custom_op",
+    # its opstring tells them apart
+    return getattr(op, "opstring", None) or getattr(op, "__name__", None) or repr(op)
+
+
+def clause_key(c):
+    r"""Hashable key of a filter, equal for filters that compile to
+    the same zdb query, ``None`` for filters the normalizer doesn't know.
+    """
+    if isinstance(c, Grouping):
+        return clause_key(c.element)
+    elif isinstance(c, BinaryExpression):
+        value = _value_key(c.right)
+        if value is None:
+            return None
+        return ("binary", c.left.table.name, c.left.name, _operator_key(c.operator),
+                value, repr(sorted(c.modifiers.items())))
+    elif isinstance(c, BooleanClauseList):
+        keys = [clause_key(_c) for _c in c.clauses]
+        if None in keys:
+            return None
+        return _operator_key(c.operator), tuple(sorted(keys, key=repr))
+    elif isinstance(c, UnaryExpression) and c.operator is not None:
+        if isinstance(c.element, Column):
+            return "unary", _operator_key(c.operator), c.element.table.name, c.element.name
+        key = clause_key(c.element)
+        return None if key is None else ("unary", _operator_key(c.operator), key)
+    return None
+
+
+def _number(c):
+    if isinstance(c, BindParameter) and not getattr(c, "expanding", False) and \
+            isinstance(c.value, RANGE_TYPES) and not isinstance(c.value, bool):
+        return c.value
+    return None
+
+
+def _kind(value):
+    # bounds that can be compared with each other
+    if isinstance(value, datetime.datetime):
+        return datetime.datetime
+    elif isinstance(value, datetime.date):
+        return datetime.date
+    return decimal.Decimal
+
+
+def _bounds(c):
+    r"""``(column, lower, upper)`` of a range filter on a number or date, where a
+    bound is ``(value, inclusive, clause)``, or ``None`` for other filters"""
+    if not isinstance(c, BinaryExpression):
+        return None
+
+    if c.operator is between_op:
+        lower, upper = (_number(_c) for _c in c.right.clauses)
+        if lower is None or upper is None or _kind(lower) is not _kind(upper):
+            return None
+        return c.left, (lower, True, None), (upper, True, None)
+
+    value = _number(c.right)
+    if value is None:
+        return None
+    elif c.operator in LOWER_OPERATORS:
+        return c.left, (value, c.operator is operator.ge, c), None
+    elif c.operator in UPPER_OPERATORS:
+        return c.left, None, (value, c.operator is operator.le, c)
+    return None
+
+
+def _tighter(bound, other, upper):
+    if other is None:
+        return bound
+    if bound[0] == other[0]:
+        # a strict bound excludes the value
+        return other if bound[1] and not other[1] else bound
+    if upper:
+        return bound if bound[0] < other[0] else other
+    return bound if bound[0] > other[0] else other
+
+
+def merge_ranges(clauses: list):
+    r"""Merges the range filters on a field that are AND'ed together into
+    one ``lower /to/ upper`` range, or the tightest ``>``/``<`` when a bound
+    is strict (``/to/`` is inclusive)."""
+    ranges = {}
+    rtn = []
+    for c in clauses:
+        bounds = _bounds(c)
+        if bounds is None:
+            rtn.append(c)
+            continue
+
+        column, lower, upper = bounds
+        key = (column.table.name, column.name, _kind((lower or upper)[0]))
+        if key not in ranges:
+            ranges[key] = [column, None, None, []]
+            rtn.append(key)
+        _range = ranges[key]
+        if lower is not None:
+            _range[1] = _tighter(lower, _range[1], upper=False)
+        if upper is not None:
+            _range[2] = _tighter(upper, _range[2], upper=True)
+        _range[3].append(c)
+
+    for i, c in enumerate(rtn):
+        if not isinstance(c, tuple):
+            continue
+
+        column, lower, upper, originals = ranges[c]
+        if len(originals) == 1:
+            rtn[i] = [originals[0]]
+        elif lower and upper and lower[1] and upper[1] and lower[0] <= upper[0]:
+            rtn[i] = [column.between(lower[0], upper[0])]
+        else:
+            rtn[i] = [_bound_clause(column, bound, strict, inclusive)
+                      for bound, strict, inclusive in (
+                          (lower, operator.gt, operator.ge), (upper, operator.lt, operator.le))
+                      if bound is not None]
+    return [_c for c in rtn for _c in (c if isinstance(c, list) else [c])]
+
+
+def _bound_clause(column, bound, strict, inclusive):
+    value, is_inclusive, c = bound
+    if c is not None:
+        return c
+    return (inclusive if is_inclusive else strict)(column, value)
+
+
+def _quotable(c):
+    r"""``==`` filters that render the same inside an IN list"""
+    from sqlalchemy_zdb.compiler import escape_tokens
+
+    if not isinstance(c, BinaryExpression) or c.operator is not operator.eq:
+        return False
+    value = c.right.value if isinstance(c.right, BindParameter) else None
+    if isinstance(value, str):
+        return escape_tokens(value) == value
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def merge_equals(clauses: list):
+    r"""Turns the ``==`` filters on a field that are OR'ed together
+    into a single IN list"""
+    fields = {}
+    for c in clauses:
+        if _quotable(c):
+            fields.setdefault((c.left.table.name, c.left.name), []).append(c)
+
+    rtn = []
+    for c in clauses:
+        if not _quotable(c):
+            rtn.append(c)
+            continue
+        equals = fields[(c.left.table.name, c.left.name)]
+        if len(equals) == 1:
+            rtn.append(c)
+        elif equals[0] is c:
+            values = sorted(set(_c.right.value for _c in equals), key=lambda v: (type(v).__name__, v))
+            rtn.append(c.left.in_(values))
+    return rtn
+
+
+def _unique(clauses: list):
+    seen = set()
+    rtn = []
+    for c in clauses:
+        key = clause_key(c)
+        if key is not None and key in seen:
+            continue
+        seen.add(key)
+        rtn.append(c)
+    return rtn
+
+
+def _sorted(clauses: list):
+    keys = [clause_key(c) for c in clauses]
+    if None in keys:
+        # unknown filters keep the order they were written in
+        return clauses
+    return [c for _, c in sorted(zip(keys, clauses), key=lambda item: repr(item[0]))]
+
+
+def _flatten(clauses, op):
+    for c in clauses:
+        if isinstance(c, Grouping):
+            c = c.element
+        if isinstance(c, BooleanClauseList) and c.operator is op:
+            for _c in _flatten(c.clauses, op):
+                yield _c
+        else:
+            yield c
+
+
+def _normalize_group(c):
+    if isinstance(c, Grouping) and isinstance(c.element, (BooleanClauseList, UnaryExpression)):
+        c = c.element
+    if isinstance(c, UnaryExpression) and c.operator is operator.inv:
+        return not_(_normalize_group(c.element))
+    if not isinstance(c, BooleanClauseList):
+        return c
+
+    if c.operator is operator.and_:
+        clauses = normalize(list(c.clauses))
+        return and_(*clauses) if len(clauses) > 1 else clauses[0]
+    elif c.operator is operator.or_:
+        clauses = [_normalize_group(_c) for _c in _flatten(c.clauses, operator.or_)]
+        clauses = _sorted(_unique(merge_equals(_unique(clauses))))
+        return or_(*clauses) if len(clauses) > 1 else clauses[0]
+    return c
+
+
+def normalize(clauses: list):
+    r"""Rewrites the zdb filters of a query, which are AND'ed together,
+    into an equivalent but smaller query:
+
+    - range filters on a field are merged into one range
+    - ``==`` filters on a field OR'ed together become one IN list
+    - duplicate filters are removed
+    - filters are sorted, so equivalent queries compile to the same
+      zdb query and share cache entries
+
+    :param clauses: filters on ``ZdbColumn``'s
+    :return: list of filters
+    """
+    clauses = [_normalize_group(c) for c in _flatten(clauses, operator.and_)]
+    return _sorted(_unique(merge_ranges(_unique(clauses))))
@@ -1,9 +1,18 @@
-import re
+import datetime
+import decimal
+import inspect
 import operator
 
-from sqlalchemy.sql.operators import match_op, like_op, between_op, in_op, isnot
+from sqlalchemy.sql.operators import (
+    match_op, like_op, between_op, in_op, is_, isnot, startswith_op, endswith_op, contains_op,
+    notmatch_op, notlike_op, notbetween_op, notin_op, notstartswith_op, notendswith_op, notcontains_op)
 
 from sqlalchemy_zdb.exceptions import InvalidParameterException
+from sqlalchemy_zdb.types import PATTERN_TYPE
+
+
+# values a range can be built from
+RANGE_TYPES = (int, float, decimal.Decimal, datetime.date)
 
 
 def zdb_between_op(left, right, *args, **kwargs):
@@ -14,11 +23,13 @@ def zdb_between_op(left, right, *args, **kwargs):
         stmt = select([sometable]).\
             where(sometable.c.column.between(5, 14.5))
     """
+    from sqlalchemy_zdb.compiler import compile_literal, literal_encoder
+
     between = []
     for i, clause in enumerate(right.clauses):
-        if not isinstance(clause.value, (int, float)):
-            raise InvalidParameterException("Numbers only")
-        between.append(clause.value)
+        if not isinstance(clause.value, RANGE_TYPES) or isinstance(clause.value, bool):
+            raise InvalidParameterException("Numbers or dates only")
+        between.append(compile_literal(clause, literal_encoder(clause.value, clause.type)))
     return "{}:{} /to/ {}".format(left.name, *between)
 
 
@@ -46,7 +57,7 @@ def zdb_like_op(left, right, c, compiler, tables, format_args):
     """
     from sqlalchemy_zdb.compiler import compile_clause
 
-    if isinstance(right.value, re._pattern_type):
+    if isinstance(right.value, PATTERN_TYPE):
         _oper = ":~"
     else:
         _oper = ":"
@@ -62,6 +73,65 @@ def zdb_in_op(left, right, c, compiler, tables, format_args):
     return "%s%s%s" % (left.name, _oper, compile_clause(right, compiler, tables, format_args))
 
 
+def zdb_wildcard_op(left, right, c, compiler, tables, format_args):
+    r"""Implement the ``startswith``, ``endswith`` and ``contains``
+    operators with wildcards.
+
+    E.g.::
+
+        stmt = select([sometable]).\
+            where(sometable.c.column.startswith("foo"))
+
+    produces the expression::
+
+        column:foo*
+    """
+    from sqlalchemy_zdb.compiler import compile_literal, encode_prefix, encode_suffix, encode_infix
+
+    if not isinstance(right.value, str):
+        raise InvalidParameterException("Strings only")
+
+    encoder = {startswith_op: encode_prefix,
+               endswith_op: encode_suffix,
+               contains_op: encode_infix}[NEGATED_OPERATORS.get(c.operator, c.operator)]
+    return "%s:%s" % (left.name, compile_literal(right, encoder))
+
+
+def zdb_not_op(left, right, c, compiler, tables, format_args):
+    r"""Implement the negated operators, ``notlike_op``, ``notin_op``, ...
+
+    E.g.::
+
+        stmt = select([sometable]).\
+            where(sometable.c.column.notin_(["foo", "bar"]))
+
+    produces the expression::
+
+        not column:("foo","bar")
+    """
+    _oper = COMPARE_OPERATORS[NEGATED_OPERATORS[c.operator]]
+    return "not %s" % compare(_oper, left, right, c, compiler, tables, format_args)
+
+
+def compare(_oper, left, right, c, compiler, tables, format_args):
+    from sqlalchemy_zdb.compiler import compile_clause
+
+    if inspect.isfunction(_oper):
+        return _oper(left, right, c, compiler, tables, format_args)
+    return '%s%s%s' % (left.name, _oper, compile_clause(right, compiler, tables, format_args))
+
+
+# negated operator -> operator it negates
+NEGATED_OPERATORS = {
+    notmatch_op: match_op,
+    notlike_op: like_op,
+    notbetween_op: between_op,
+    notin_op: in_op,
+    notstartswith_op: startswith_op,
+    notendswith_op: endswith_op,
+    notcontains_op: contains_op
+}
+
 COMPARE_OPERATORS = {
     operator.gt: " > ",
     operator.lt: " < ",
@@ -73,5 +143,10 @@ COMPARE_OPERATORS = {
     operator.eq: ":",
     between_op: zdb_between_op,
     in_op: zdb_in_op,
-    isnot: " != "
+    is_: ":",
+    isnot: " != ",
+    startswith_op: zdb_wildcard_op,
+    endswith_op: zdb_wildcard_op,
+    contains_op: zdb_wildcard_op
 }
+COMPARE_OPERATORS.update({op: zdb_not_op for op in NEGATED_OPERATORS})
@@ -0,0 +1,162 @@
+import operator
+
+from sqlalchemy import and_, or_, not_
+from sqlalchemy.sql.annotation import AnnotatedColumn
+from sqlalchemy.sql.elements import BinaryExpression, BooleanClauseList, Grouping, UnaryExpression
+
+from sqlalchemy_zdb.types import ZdbColumn
+
+
+def filter_columns(expr):
+    r"""Base columns of the comparisons in a filter, an empty
+    list when a part of it is not a comparison with a column"""
+    if isinstance(expr, Grouping):
+        expr = expr.element
+
+    if isinstance(expr, BooleanClauseList):
+        _columns = []
+        for c in expr.clauses:
+            columns = filter_columns(c)
+            if not columns:
+                return []
+            _columns.extend(columns)
+        return _columns
+    elif isinstance(expr, UnaryExpression) and expr.operator is not None:
+        if isinstance(expr.element, AnnotatedColumn):
+            # ~boolean_column
+            return list(expr.element.base_columns)
+        return filter_columns(expr.element)
+    elif isinstance(expr, BinaryExpression) and isinstance(expr.left, AnnotatedColumn):
+        return list(expr.left.base_columns)
+    return []
+
+
+def is_zdb(expr):
+    r"""True when all of a filter can be answered by the zdb index"""
+    columns = filter_columns(expr)
+    return bool(columns) and all(type(c) == ZdbColumn for c in columns)
+
+
+def _ungroup(expr):
+    while isinstance(expr, Grouping):
+        expr = expr.element
+    return expr
+
+
+def _push_not(expr):
+    r"""``~and_(a, b)`` as ``or_(~a, ~b)`` and ``~or_(a, b)`` as
+    ``and_(~a, ~b)``, ``None`` for other negations"""
+    element = _ungroup(expr.element)
+    if not isinstance(element, BooleanClauseList):
+        return None
+    negated = [not_(c) for c in element.clauses]
+    if element.operator is operator.and_:
+        return or_(*negated)
+    elif element.operator is operator.or_:
+        return and_(*negated)
+    return None
+
+
+def implied(expr):
+    r"""A zdb filter that holds for every row the filter ``expr``
+    holds for, ``None`` when there is none.
+
+    - a zdb-only filter implies itself
+    - ``and_()`` implies the zdb filters implied by its parts
+    - ``or_()`` implies the ``or_()`` of what its parts imply, but
+      only when every part implies something
+    """
+    expr = _ungroup(expr)
+    if is_zdb(expr):
+        return expr
+    elif isinstance(expr, UnaryExpression) and expr.operator is operator.inv:
+        pushed = _push_not(expr)
+        return implied(pushed) if pushed is not None else None
+    elif isinstance(expr, BooleanClauseList):
+        parts = [implied(c) for c in expr.clauses]
+        if expr.operator is operator.and_:
+            parts = [p for p in parts if p is not None]
+            if not parts:
+                return None
+            return and_(*parts) if len(parts) > 1 else parts[0]
+        elif expr.operator is operator.or_ and all(p is not None for p in parts):
+            return or_(*parts)
+    return None
+
+
+def residual(expr, wrap):
+    r"""``expr`` with the largest zdb-only parts of it replaced by
+    ``wrap(part)``, so Postgres runs them as zdb queries instead of
+    as plain SQL, where regexes, ``match()`` or full text columns
+    don't mean what they do in zdb.
+
+        or_(zdb_a, zdb_b, sql_c) -> or_(wrap(or_(zdb_a, zdb_b)), sql_c)
+    """
+    _expr = _ungroup(expr)
+    if is_zdb(_expr):
+        return wrap(_expr)
+    elif isinstance(_expr, UnaryExpression) and _expr.operator is operator.inv:
+        return not_(residual(_expr.element, wrap))
+    elif isinstance(_expr, BooleanClauseList) and _expr.operator in (operator.and_, operator.or_):
+        combine = and_ if _expr.operator is operator.and_ else or_
+        zdb = [_ungroup(c) for c in _expr.clauses if is_zdb(_ungroup(c))]
+        clauses = []
+        for c in _expr.clauses:
+            if not is_zdb(_ungroup(c)):
+                clauses.append(residual(c, wrap))
+            elif zdb:
+                # the zdb parts together, where the first of them was
+                clauses.append(wrap(combine(*zdb) if len(zdb) > 1 else zdb[0]))
+                zdb = None
+        return combine(*clauses)
+    return expr
+
+
+def _split(expr, rtn, wrap):
+    _expr = _ungroup(expr)
+    if is_zdb(_expr):
+        rtn["zdb"].append(_expr)
+        return
+
+    if isinstance(_expr, UnaryExpression) and _expr.operator is operator.inv:
+        pushed = _push_not(_expr)
+        if pushed is not None and pushed.operator is operator.and_:
+            # ~or_(zdb, sql) is ~zdb AND ~sql, which splits exactly
+            _split(pushed, rtn, wrap)
+            return
+
+    if isinstance(_expr, BooleanClauseList) and _expr.operator is operator.and_:
+        for c in _expr.clauses:
+            _split(c, rtn, wrap)
+        return
+
+    # an or_() mixing zdb and SQL columns can not be split, but the
+    # zdb filters it implies still narrow the rows Postgres visits
+    zdb = implied(_expr)
+    if zdb is not None:
+        rtn["zdb"].append(zdb)
+    rtn["sqla"].append(expr if wrap is None else residual(expr, wrap))
+
+
+def split(clauses: list, wrap=None):
+    r"""Splits filters, which are AND'ed together, between the zdb
+    query and the SQL ``WHERE`` clause, pushing as much as possible
+    into the index:
+
+    - zdb-only filters, including ``or_()``'s and negations of them,
+      go to the zdb query as a whole
+    - ``and_()``'s are split into their parts, as is ``~or_()``
+    - other filters stay in SQL, preceded in the zdb query by the zdb
+      filter they imply, ``or_(and_(zdb_a, sql_b), zdb_c)`` adds
+      ``(zdb_a or zdb_c)``, and with ``wrap`` its zdb-only parts are
+      run as zdb queries, see ``residual()``
+
+    :param clauses: filters of a query
+    :param wrap: turns a zdb-only filter left in SQL into a SQL
+        predicate, ``zdb_raw_query`` usually
+    :return: dict with the ``zdb`` and ``sqla`` filters
+    """
+    rtn = {"zdb": [], "sqla": []}
+    for c in clauses:
+        _split(c, rtn, wrap)
+    return rtn
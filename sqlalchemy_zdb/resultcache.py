@@ -0,0 +1,162 @@
+import copy
+import uuid
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.state import InstanceState
+from sqlalchemy.orm.query import Query
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_zdb.cache import CacheBackend, TTLCache
+from sqlalchemy_zdb.utils import is_zdb_table
+
+
+class _DetachedRow(object):
+    r"""Column values of a cached instance, apart from any session"""
+    __slots__ = ("cls", "values")
+
+    def __init__(self, cls, values):
+        self.cls = cls
+        self.values = values
+
+
+def _freeze(value):
+    state = inspect(value, raiseerr=False)
+    if not isinstance(state, InstanceState):
+        return value
+    values = {prop.key: state.dict[prop.key] for prop in state.mapper.column_attrs
+              if prop.key in state.dict}
+    return _DetachedRow(state.mapper.class_, copy.deepcopy(values))
+
+
+def _thaw(value):
+    if not isinstance(value, _DetachedRow):
+        return value
+    instance = inspect(value.cls).class_manager.new_instance()
+    for key, _value in copy.deepcopy(value.values).items():
+        set_committed_value(instance, key, _value)
+    make_transient_to_detached(instance)
+    return instance
+
+
+class ResultCache(object):
+    r"""Caches the results of ``ZdbQuery.all()`` for queries marked
+    with ``ZdbQuery.cache()``, keyed on their SQL and parameters.
+
+        result_cache = ResultCache(TTLCache(maxsize=1024, ttl=30))
+        result_cache.listen()
+
+        q = ZdbQuery(Products, session=session).cache(result_cache)
+
+    Every key also holds a generation token per table the query
+    reads from. Writing to a table with ``ZdbColumn``'s through a
+    ``Session`` replaces the token of that table on commit (see
+    ``listen()``), which makes all cached results of that table
+    unreachable. Writes outside of the ORM (``bulk_load``, Core
+    statements) call for ``invalidate()``.
+
+    :param backend: ``CacheBackend``, an in-process ``TTLCache`` by default
+    """
+    def __init__(self, backend: CacheBackend = None):
+        self.backend = backend if backend is not None else TTLCache(maxsize=512, ttl=60)
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, table: str):
+        key = ("zdb_generation", table)
+        generation = self.backend.get(key)
+        if generation is None:
+            # a lost token invalidates the table, never revives old entries
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation, ttl=0)
+        return generation
+
+    def invalidate(self, *tables):
+        r"""Drops the cached results of queries reading from ``tables``
+        :param tables: table names or ``sqlalchemy.Table``'s
+        """
+        for table in tables:
+            self.backend.set(("zdb_generation", getattr(table, "name", table)),
+                             uuid.uuid4().hex, ttl=0)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, query):
+        r"""Cache key of a built ``ZdbQuery``, the SQL of
+        ``query_to_sql()`` and the entities it loads, plus the
+        generations of its tables."""
+        statement = query.statement
+        compiled = statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled) % compiled.params if compiled.params else str(compiled)
+        tables = sorted(set(table.name for table in find_tables(statement, include_joins=True)))
+        # query(Model) and query(Model, Model.column) can share their SQL
+        entities = tuple(d["name"] for d in query.column_descriptions)
+        return ("zdb_result", sql, entities) + tuple((table, self._generation(table)) for table in tables)
+
+    def fetch(self, query, ttl: float = None):
+        r"""Results of a built ``ZdbQuery``, from cache when possible.
+
+        The cache holds the column values of the results, not the
+        instances of the session that loaded them. Every fetch merges
+        detached copies into the session of ``query`` without emitting
+        SQL, as with ``Query.merge_result()``.
+        """
+        key = self.key(query)
+        rows = self.backend.get(key)
+        if rows is None:
+            self.misses += 1
+            rows = [_freeze(row) if isinstance(inspect(row, raiseerr=False), InstanceState)
+                    else tuple(_freeze(value) for value in row)
+                    for row in Query.all(query)]
+            self.backend.set(key, rows, ttl=ttl)
+        else:
+            self.hits += 1
+        rows = [_thaw(row) if isinstance(row, _DetachedRow)
+                else tuple(_thaw(value) for value in row) for row in rows]
+        return list(query.merge_result(rows, load=False))
+
+    def info(self):
+        r"""Result ``hits``, ``misses`` and ``hit_ratio``, plus the
+        statistics of the backend like its ``memory`` use"""
+        info = dict(self.backend.info())
+        total = self.hits + self.misses
+        info.update({
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        })
+        return info
+
+    def listen(self, target=Session):
+        r"""Invalidates tables with ``ZdbColumn``'s written through
+        ``target`` when its transaction commits.
+        :param target: ``Session`` class, ``sessionmaker`` or instance
+        """
+        event.listen(target, "after_flush", self._after_flush)
+        event.listen(target, "after_commit", self._after_commit)
+        event.listen(target, "after_rollback", self._after_rollback)
+
+    def _after_flush(self, session, flush_context):
+        tables = session.info.setdefault("zdb_written_tables", set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            for table in inspect(obj).mapper.tables:
+                if is_zdb_table(table):
+                    tables.add(table.name)
+
+    def _after_commit(self, session):
+        tables = session.info.pop("zdb_written_tables", None)
+        if tables:
+            self.invalidate(*tables)
+
+    def _after_rollback(self, session):
+        session.info.pop("zdb_written_tables", None)
+
+
+# used by ZdbQuery.cache() when no ResultCache is passed
+RESULT_CACHE = ResultCache()
+RESULT_CACHE.listen()
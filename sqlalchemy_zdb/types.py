@@ -1,6 +1,18 @@
+import re
+
 from sqlalchemy import Column
 from sqlalchemy.types import UserDefinedType
 
+try:
+    # statement cache keys, SQLAlchemy 1.4+
+    from sqlalchemy.sql.traversals import NO_CACHE
+    from sqlalchemy.sql.visitors import InternalTraversal
+except ImportError:
+    NO_CACHE = InternalTraversal = None
+
+# re._pattern_type was removed in Python 3.7
+PATTERN_TYPE = type(re.compile(""))
+
 
 class _ZdbDomain(UserDefinedType):
     """
@@ -59,6 +71,8 @@ class FULLTEXT_SHINGLES(_ZdbDomain):
 
 
 class ZdbColumn(Column):
+    inherit_cache = True
+
     def __init__(self, *args, **kwargs):
         super(ZdbColumn, self).__init__(*args, **kwargs)
 
@@ -77,6 +91,10 @@ class ZdbLiteral(object):
 
 
 class ZdbScore(Column):
+    if InternalTraversal is not None:
+        # only the direction tells two ZdbScore's apart
+        _traverse_internals = [("_zdb_direction", InternalTraversal.dp_string)]
+
     def __init__(self, direction="asc"):
         super(ZdbScore, self)
         if not direction in ("asc", "desc"):
@@ -1,6 +1,6 @@
 from __future__ import print_function
 from sqlalchemy.sql import compiler
-from sqlalchemy import text
+from sqlalchemy import text, DDL
 from sqlalchemy.sql.sqltypes import ARRAY
 from sqlalchemy.dialects.postgresql.psycopg2 import PGCompiler_psycopg2
 from psycopg2.extensions import adapt as sqlescape
@@ -103,6 +103,109 @@ def has_index(table_name, index_name, connection):
     return connection.execute(text(sql), table_name=table_name, index_name=index_name).fetchone()
 
 
+def get_catalog_snapshot(connection):
+    """
+    Reads the names of all types and indexes in two catalog queries,
+    to answer the ``has_type``/``has_index`` questions of many tables
+    without a round trip each.
+    :param connection:
+    :return: ``{"types": {type_name, ...}, "indexes": {(table_name, index_name), ...}}``
+    """
+    types = """
+    SELECT t.typname AS type
+    FROM pg_type t
+      LEFT JOIN pg_catalog.pg_namespace n ON n.oid = t.typnamespace
+    WHERE (t.typrelid = 0 OR (SELECT c.relkind = 'c'
+                              FROM pg_catalog.pg_class c
+                              WHERE c.oid = t.typrelid))
+          AND NOT EXISTS(SELECT 1
+                         FROM pg_catalog.pg_type el
+                         WHERE el.oid = t.typelem AND el.typarray = t.oid)
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema');"""
+    indexes = """
+    SELECT tablename, indexname FROM pg_indexes
+    WHERE schemaname NOT IN ('pg_catalog', 'information_schema');"""
+    return {
+        "types": set(row[0] for row in connection.execute(text(types))),
+        "indexes": set((row[0], row[1]) for row in connection.execute(text(indexes)))
+    }
+
+
+def get_zdb_index_name(model):
+    r"""Name of the ZomboDB index created for a table
+    :param model: ``sqlalchemy.Table``
+    """
+    return "idx_zdb_%s" % model.name.lower()
+
+
+def get_zdb_type_name(model):
+    r"""Name of the composite type the ZomboDB index of a table is built on
+    :param model: ``sqlalchemy.Table``
+    """
+    return "type_%s" % model.name.lower()
+
+
+def get_index_options(index_name, connection):
+    """
+    Reads the storage options (``WITH (...)``) of an index
+    :param index_name: name of the index
+    :param connection:
+    :return: dict of option name to (string) value
+    """
+    sql = """
+    SELECT unnest(c.reloptions) FROM pg_class c
+    WHERE c.relkind = 'i' AND c.relname = :index_name;"""
+    rtn = {}
+    for row in connection.execute(text(sql), index_name=index_name):
+        name, _, value = row[0].partition("=")
+        rtn[name] = value
+    return rtn
+
+
+def format_index_option(value):
+    r"""Value of an index option as Postgres stores it in ``reloptions``"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def get_index_options_as_ddl(options):
+    r"""``name='value', ...`` for ``WITH (...)`` and ``ALTER INDEX ... SET (...)``
+    :param options: dict of option name to value
+    """
+    # DDL() formats its statement, keep literal %'s
+    return ", ".join("%s=%s" % (k, sqlescape(format_index_option(v)).getquoted().decode().replace("%", "%%"))
+                     for k, v in options.items())
+
+
+def get_zdb_index_options(model):
+    r"""Options of the ZomboDB index of a table, from ``__zdb_options__``
+    on the model (or ``info={"zdb_options": ...}`` on the table), with
+    ``url`` defaulting to ``ES_HOST``.
+    :param model: ``sqlalchemy.Table``
+    """
+    from sqlalchemy_zdb import ES_HOST
+    options = {"url": ES_HOST}
+    options.update(model.info.get("zdb_options") or {})
+    return options
+
+
+def set_index_options(index_name, options, connection):
+    """
+    ALTER INDEX ... SET (...), options that are None are RESET
+    :param index_name: name of the index
+    :param options: dict of option name to value
+    :param connection:
+    """
+    _set = {k: v for k, v in options.items() if v is not None}
+    _reset = [k for k, v in options.items() if v is None]
+
+    if _set:
+        connection.execute(DDL("ALTER INDEX %s SET (%s)" % (index_name, get_index_options_as_ddl(_set))))
+    if _reset:
+        connection.execute(DDL("ALTER INDEX %s RESET (%s)" % (index_name, ", ".join(_reset))))
+
+
 def verify_type():
     pass
 
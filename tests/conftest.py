@@ -1,4 +1,5 @@
 import os
+import asyncio
 
 import sqlalchemy_zdb
 from sqlalchemy import create_engine, text
@@ -6,7 +7,8 @@ from sqlalchemy.orm import Session
 
 import tests.settings as settings
 from tests.settings import db_user, db_pass, db_host, db_port, db_name
-from tests.models import base
+from sqlalchemy_zdb.bulk import copy_file
+from tests.models import base, Products
 import pytest
 
 
@@ -43,12 +45,9 @@ def db_composite_type(engine):
 def tables(engine):
     base.metadata.create_all(engine)
 
-    connection = engine.connect()
-    session = Session(bind=connection)
-    session.execute(text("""COPY products FROM :path"""),
-                    params={"path": "%s/data/test-data.dmp" % cwd})
-    session.commit()
-    session.flush()
+    with engine.begin() as connection:
+        with open("%s/data/test-data.dmp" % cwd) as f:
+            copy_file(connection, Products, f)
     yield
     base.metadata.drop_all(engine)
 
@@ -73,6 +72,22 @@ def dbsession(engine, db_extension, db_composite_type, tables):
     connection.close()
 
 
+@pytest.fixture
+def async_session(engine, db_extension, db_composite_type, tables):
+    """Returns an ``AsyncSession`` on asyncpg, for SQLAlchemy >= 1.4 only."""
+    pytest.importorskip("asyncpg")
+    asyncio_ext = pytest.importorskip("sqlalchemy.ext.asyncio")
+
+    async_engine = asyncio_ext.create_async_engine("postgresql+asyncpg://%s:%s@%s:%d/%s" % (
+        db_user, db_pass, db_host, db_port, db_name))
+    session = asyncio_ext.AsyncSession(async_engine)
+
+    yield session
+
+    asyncio.get_event_loop().run_until_complete(session.close())
+    asyncio.get_event_loop().run_until_complete(async_engine.dispose())
+
+
 @pytest.fixture(scope="session")
 def db_cleanup(session):
     session.execute(text("""
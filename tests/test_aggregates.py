@@ -0,0 +1,40 @@
+import pytest
+
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.aggregates import terms, range_agg, stats, TermsBucket, RangeBucket, Stats
+
+
+def test_aggregate_terms(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 0)
+
+    authors, = q.aggregate(terms(Products.author, size=10))
+    assert all(isinstance(bucket, TermsBucket) for bucket in authors)
+    assert sorted((b.term, b.count) for b in authors) == [("admin", 2), ("foo", 2)]
+
+
+def test_aggregate_many(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+
+    prices, price_stats = q.aggregate(
+        range_agg(Products.price, [{"key": "cheap", "to": 5000}, {"key": "expensive", "from": 5000}]),
+        stats(Products.price))
+
+    assert all(isinstance(bucket, RangeBucket) for bucket in prices)
+    assert {b.key: b.doc_count for b in prices} == {"cheap": 1, "expensive": 1}
+
+    assert isinstance(price_stats, Stats)
+    assert price_stats.count == 2
+    assert price_stats.min == 1899
+    assert price_stats.max == 17000
+
+
+def test_aggregate_sqla_filter(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+    q = q.filter(Products.inventory_count > 5)
+
+    with pytest.raises(Exception):
+        q.aggregate(terms(Products.author))
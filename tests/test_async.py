@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from tests.models import Products
+from sqlalchemy_zdb.aggregates import terms, stats
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_async_all(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.author == "foo")
+
+    results = run(q.all())
+    assert sorted(r.id for r in results) == [3, 4]
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.price > 10000)
+    assert run(q.first()).id == 4
+
+
+def test_async_count(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    q = AsyncZdbQuery(Products, session=async_session, bind_query=True)
+    q = q.filter(Products.author == "admin")
+    assert run(q.count()) == 2
+
+    # falls back to SELECT count(*) because of the sqla filter
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.price > 1000)
+    q = q.filter(Products.inventory_count >= 42)
+    assert run(q.count()) == 2
+
+
+def test_async_stream(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    async def collect(q):
+        return [r async for r in q.stream(batch_size=1)]
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.price < 10000)
+    q = q.filter(Products.inventory_count >= 42)
+
+    results = run(collect(q))
+    assert sorted(r.id for r in results) == [1, 3]
+
+
+def test_async_aggregate(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    async def search():
+        q = AsyncZdbQuery(Products, session=async_session)
+        q = q.filter(Products.price > 1500)
+        authors, prices = await q.aggregate(terms(Products.author), stats(Products.price))
+        return authors, prices, await q.count()
+
+    authors, prices, count = run(search())
+    assert {b.term: b.count for b in authors} == {"foo": 2, "admin": 1}
+    assert prices.count == count == 3
+
+
+def test_async_ids(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    async def search():
+        q = AsyncZdbQuery(Products, session=async_session)
+        q = q.filter(Products.price > 1000)
+        q = q.order_by(Products.price.asc())
+        ids = await q.ids()
+        return ids, await q.ctids(), await q.hydrate(ids + [999], batch_size=3)
+
+    ids, ctids, products = run(search())
+    assert ids == [2, 3, 1, 4]
+    assert len(ctids) == 4
+    assert [p.id for p in products] == ids
+
+
+def test_async_paginate_keyset(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    async def collect(q):
+        return [page async for page in q.paginate_keyset(order_by=Products.price.asc(), page_size=3)]
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.price > 0)
+
+    pages = run(collect(q))
+    assert [len(page) for page in pages] == [3, 1]
+    assert [r.id for page in pages for r in page] == [2, 3, 1, 4]
+
+    pages = run(collect(q.filter(Products.inventory_count >= 2)))
+    assert [r.id for page in pages for r in page] == [2, 3, 1]
+
+
+def test_async_explain(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    q = q.filter(Products.price > 1000, Products.inventory_count >= 42)
+
+    e = run(q.explain())
+    assert "Plan" in e.plan
+    assert e.zdb_predicates == ["zdb('products', ctid) ==> 'price > 1000'"]
+    assert e.sql_predicates == ["products.inventory_count >= 42"]
+
+
+def test_async_cache(async_session):
+    from sqlalchemy_zdb.asyncio import AsyncZdbQuery
+
+    q = AsyncZdbQuery(Products, session=async_session)
+    with pytest.raises(Exception, match="does not support the result cache"):
+        q.cache()
@@ -0,0 +1,40 @@
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.types import ZdbScore
+
+
+def test_bind_query(dbsession):
+    statements = []
+    for author in ["foo", "admin"]:
+        q = ZdbQuery(Products, session=dbsession, bind_query=True)
+        q = q.filter(Products.author == author)
+        q = q.filter(Products.price.between(1000, 20000))
+        statements.append(str(q._zdb_compile()))
+
+        results = q.all()
+        assert len(results) >= 1
+        assert all(r.author == author for r in results)
+
+    assert statements[0] == statements[1]
+    assert validate_sql(statements[0], target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> ('author:' || %(author_1)s || ' and price:' || %(price_1)s || ' /to/ ' || %(price_2)s)
+    """) is True
+
+
+def test_bind_query_limit(dbsession):
+    q = ZdbQuery(Products, session=dbsession, bind_query=True)
+    q = q.filter(Products.price > 0)
+    q = q.order_by(ZdbScore("desc"))
+    q = q.limit(1).offset(1)
+
+    compiled = q._zdb_compile()
+    assert "#limit(_score desc, ' || %(zdb_offset_1)s || ', ' || %(zdb_limit_1)s || ') price > ' || %(price_1)s" \
+        in str(compiled)
+    assert compiled.params["zdb_offset_1"] == 1
+    assert compiled.params["zdb_limit_1"] == 1
+
+    results = q.all()
+    assert len(results) == 1
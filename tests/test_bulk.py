@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+from psycopg2 import IntegrityError
+
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.bulk import bulk_load, to_copy_row, BulkLoadResult
+from sqlalchemy_zdb.utils import get_index_options
+
+
+def test_to_copy_row():
+    row = to_copy_row([1, "a\tb", ["x", 'y "z"'], None, False, datetime.date(2015, 8, 31)])
+    assert row == '1\ta\\tb\t{"x","y \\\\"z\\\\""}\t\\N\tf\t2015-08-31\n'
+
+
+def test_bulk_load(dbsession):
+    rows = [{"id": 100 + i, "name": "Bulk %d" % i, "price": 100 + i, "author": "bulk"}
+            for i in range(25)]
+    rows.append(Products(id=200, name="Bulk model", price=200, author="bulk"))
+
+    progress = []
+    result = bulk_load(dbsession.connection(), Products, rows, batch_size=10,
+                       index_options={"refresh_interval": "-1"}, progress=progress.append)
+
+    assert isinstance(result, BulkLoadResult)
+    assert result.rows == 26
+    assert result.batches == 3
+    assert [p.rows for p in progress] == [10, 20, 26]
+
+    # options are restored after loading
+    assert "refresh_interval" not in get_index_options("idx_zdb_products", dbsession.connection())
+
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "bulk")
+    assert len(q.all()) == 26
+
+
+def test_bulk_load_failure(engine, db_extension, tables):
+    # the second row is a duplicate primary key, COPY fails in Postgres
+    rows = [{"id": 300, "name": "Bulk failure", "price": 300, "author": "bulk"},
+            {"id": 300, "name": "Bulk failure", "price": 300, "author": "bulk"}]
+
+    # the COPY error is raised, not one of restoring the options
+    with pytest.raises(IntegrityError):
+        bulk_load(engine, Products, rows, index_options={"refresh_interval": "-1"})
+
+    # the rollback restored the options
+    with engine.connect() as connection:
+        assert "refresh_interval" not in get_index_options("idx_zdb_products", connection)
+
+
+def test_bulk_load_encoding_failure(dbsession):
+    rows = [{"id": 300, "name": "Bulk failure", "price": 300, "author": "bulk"}, object()]
+
+    with pytest.raises(AttributeError):
+        bulk_load(dbsession.connection(), Products, rows, index_options={"refresh_interval": "-1"})
+
+    # options are restored when the transaction is still usable
+    assert "refresh_interval" not in get_index_options("idx_zdb_products", dbsession.connection())
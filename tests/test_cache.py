@@ -0,0 +1,64 @@
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.compiler import QUERY_CACHE
+from sqlalchemy_zdb.utils import query_to_sql
+
+
+def test_query_cache(dbsession):
+    QUERY_CACHE.clear()
+
+    for author, price in [("foo", 9000), ("admin", 1500)]:
+        q = ZdbQuery(Products, session=dbsession)
+        q = q.filter(Products.author == author)
+        q = q.filter(Products.price > price)
+
+        sql = query_to_sql(q)
+        assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:"%s" and price > %d'
+        """ % (author, price)) is True
+
+    info = QUERY_CACHE.info()
+    assert info["misses"] == 1
+    assert info["hits"] == 1
+    assert info["size"] == 1
+
+
+def test_query_cache_shape(dbsession):
+    QUERY_CACHE.clear()
+
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+    query_to_sql(q)
+
+    # same column, different operator
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author != "foo")
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author != "foo"'
+    """) is True
+
+    assert QUERY_CACHE.info()["size"] == 2
+    assert QUERY_CACHE.info()["hits"] == 0
+
+
+def test_query_cache_eviction(dbsession):
+    QUERY_CACHE.clear()
+    maxsize = QUERY_CACHE.maxsize
+    QUERY_CACHE.maxsize = 1
+
+    try:
+        for column in [Products.author, Products.short_summary, Products.author]:
+            q = ZdbQuery(Products, session=dbsession)
+            q = q.filter(column == "foo")
+            query_to_sql(q)
+
+        assert QUERY_CACHE.info()["size"] == 1
+        assert QUERY_CACHE.info()["misses"] == 3
+    finally:
+        QUERY_CACHE.maxsize = maxsize
@@ -0,0 +1,50 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+
+
+def test_count(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+
+    # SQLAlchemy 1.4 labels the column, AS zdb_estimate_count_1
+    sql = str(q._zdb_count_statement().compile(dialect=postgresql.dialect()))
+    assert sql.startswith("SELECT zdb_estimate_count('products', 'author:\"foo\"')")
+
+    assert q.count() == 2
+    assert q.estimate_count() == 2
+
+
+def test_count_limit(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.limit(2).offset(1)
+
+    assert q.count() == 2
+
+
+def test_count_exact(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.filter(Products.inventory_count >= 42)
+
+    # falls back to SELECT count(*) because of the sqla filter
+    assert q._zdb_count_statement() is None
+    assert q.count() == 2
+
+
+def test_count_join(dbsession):
+    other = aliased(Products)
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.join(other, other.id == Products.id)
+    q = q.filter(Products.author == "foo")
+
+    # the index only knows the rows of products
+    assert q._zdb_count_statement() is None
+    assert q.count() == 2
+
+    q = ZdbQuery(Products, session=dbsession).filter(Products.author == "foo")
+    assert q.distinct()._zdb_count_statement() is None
+    assert q.group_by(Products.id)._zdb_count_statement() is None
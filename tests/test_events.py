@@ -0,0 +1,38 @@
+from sqlalchemy import MetaData, Table, Column, Integer, Unicode
+
+from tests.models import base, Products
+from sqlalchemy_zdb.events import before_create, after_create
+from sqlalchemy_zdb.types import ZdbColumn
+from sqlalchemy_zdb.utils import get_zdb_type_name, has_index
+
+
+def test_create_all_listeners(engine, tables):
+    table = Products.__table__
+    before = len(table.dispatch.before_create), len(table.dispatch.after_create)
+
+    # repeated create_all() calls don't stack DDL listeners
+    base.metadata.create_all(engine)
+    base.metadata.create_all(engine)
+
+    assert (len(table.dispatch.before_create), len(table.dispatch.after_create)) == before
+    assert len(base.metadata.dispatch.before_create) == 1
+
+
+def test_stale_catalog_snapshot(engine, db_extension):
+    metadata = MetaData()
+    table = Table("stale_catalog", metadata,
+                  Column("id", Integer, primary_key=True), ZdbColumn("name", Unicode()))
+    before_create(table)
+    after_create(table)
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            # left on the pooled connection by a create_all() that failed,
+            # it claims the composite type exists
+            connection.info["zdb_catalog"] = (lambda: None, {"types": {get_zdb_type_name(table)}, "indexes": set()})
+            table.create(connection)
+            assert has_index(table_name="stale_catalog", index_name="idx_zdb_stale_catalog", connection=connection)
+        finally:
+            transaction.rollback()
+            connection.info.pop("zdb_catalog", None)
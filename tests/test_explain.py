@@ -0,0 +1,43 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.explain import plan_timing
+
+
+def test_explain(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+    q = q.filter(Products.inventory_count > 10)
+
+    e = q.explain()
+    assert "Plan" in e.plan
+    assert e.es_query
+    assert e.zdb_predicates == ["zdb('products', ctid) ==> 'author:\"foo\"'"]
+    assert e.sql_predicates == ["products.inventory_count > 10"]
+    assert e.timing is None
+
+
+def test_explain_analyze(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+
+    e = q.explain(analyze=True)
+    assert e.sql_predicates == []
+    assert e.timing["execution"] > 0
+    assert e.timing["index_scan"] >= 0
+
+
+def test_plan_timing():
+    plan = {
+        "Planning Time": 0.2,
+        "Execution Time": 10.3,
+        "Plan": {
+            "Node Type": "Bitmap Heap Scan", "Actual Total Time": 10.0, "Actual Loops": 1,
+            "Rows Removed by Filter": 3,
+            "Plans": [{"Node Type": "Bitmap Index Scan", "Index Name": "idx_zdb_products",
+                       "Actual Total Time": 7.5, "Actual Loops": 1}]
+        }
+    }
+    timing = plan_timing(plan, "idx_zdb_products")
+    assert timing["index_scan"] == 7.5
+    assert timing["heap_fetch"] == 2.5
+    assert timing["rows_removed_by_filter"] == 3
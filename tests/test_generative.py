@@ -0,0 +1,57 @@
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.utils import query_to_sql
+
+
+def test_shared_base_query(dbsession):
+    base = ZdbQuery(Products, session=dbsession).filter(Products.price > 1000)
+
+    q1 = base.filter(Products.author == "foo")
+    q2 = base.order_by(Products.price.desc()).limit(2)
+
+    # deriving queries leaves the base query untouched
+    assert base._zdb_data["filter"] is not q1._zdb_data["filter"]
+    assert len(base._zdb_data["filter"]) == 1
+    assert base._zdb_data["limit"] is None
+
+    sql = query_to_sql(base)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 1000'
+    """) is True
+
+    sql = query_to_sql(q1)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:"foo" and price > 1000'
+    """) is True
+
+    assert len(q2.all()) == 2
+    assert len(base.all()) == 4
+
+
+def test_filter_several_criteria(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000, Products.author == "foo")
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:"foo" and price > 1000'
+    """) is True
+
+
+def test_built_query_memoized(dbsession):
+    q = ZdbQuery(Products, session=dbsession).filter(Products.price > 1000)
+
+    built = q._zdb_make_query()
+    assert q._zdb_make_query() is built
+    assert built._zdb_make_query() is built
+
+    # a derived query builds its own statement
+    assert q.limit(1)._zdb_make_query() is not built
+    assert q._zdb_make_query() is built
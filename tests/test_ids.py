@@ -0,0 +1,28 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+
+
+def test_ids(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.order_by(Products.price.desc())
+
+    assert q.ids() == [4, 1, 3, 2]
+
+    ctids = q.ctids()
+    assert len(ctids) == 4
+    assert all(ctid.startswith("(") for ctid in ctids)
+
+
+def test_hydrate(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.order_by(Products.price.asc())
+
+    ids = q.ids()
+    assert ids == [2, 3, 1, 4]
+
+    # order of the ids is kept across batches, unknown ids are skipped
+    products = q.hydrate(ids + [999], batch_size=3)
+    assert [p.id for p in products] == ids
+    assert products[0].price == 1249
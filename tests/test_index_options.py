@@ -0,0 +1,52 @@
+from sqlalchemy import MetaData, Table, Column, Integer, Unicode
+
+from tests.models import Products
+from sqlalchemy_zdb.events import get_zdb_index_ddl, before_create, after_create
+from sqlalchemy_zdb.indexes import sync_index_options
+from sqlalchemy_zdb.types import ZdbColumn
+from sqlalchemy_zdb.utils import get_index_options, get_zdb_index_name
+
+
+def test_index_options_ddl():
+    table = Products.__table__
+    table.info["zdb_options"] = {"shards": 3, "url": "http://es:9200/"}
+    try:
+        assert "WITH (url='http://es:9200/', shards='3');" in get_zdb_index_ddl(table)
+    finally:
+        table.info.pop("zdb_options")
+
+
+def test_index_options_at_create(engine, db_extension):
+    metadata = MetaData()
+    table = Table("options_at_create", metadata,
+                  Column("id", Integer, primary_key=True), ZdbColumn("name", Unicode()))
+    before_create(table)
+    after_create(table)
+
+    # changed after the listeners are set up, read when the index is created
+    table.info["zdb_options"] = {"batch_size": 1000}
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            metadata.create_all(connection)
+            assert get_index_options(get_zdb_index_name(table), connection)["batch_size"] == "1000"
+        finally:
+            transaction.rollback()
+
+
+def test_sync_index_options(dbsession):
+    table = Products.__table__
+    connection = dbsession.connection()
+
+    table.info["zdb_options"] = {"batch_size": 1000}
+    try:
+        assert sync_index_options(table, connection) == {"products": {"batch_size": "1000"}}
+        assert get_index_options("idx_zdb_products", connection)["batch_size"] == "1000"
+        # nothing changed
+        assert sync_index_options(table, connection) == {}
+    finally:
+        table.info.pop("zdb_options")
+
+    assert sync_index_options(table, connection) == {"products": {"batch_size": None}}
+    assert "batch_size" not in get_index_options("idx_zdb_products", connection)
@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+from tests.models import base, Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.indexes import build_indexes
+from sqlalchemy_zdb.utils import has_index
+
+
+def test_build_indexes(engine, tables):
+    # everything exists already
+    assert build_indexes(base.metadata, engine, workers=2) == []
+
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX idx_zdb_products"))
+
+    done = []
+    results = build_indexes(base.metadata, engine, workers=2, concurrently=True, progress=done.append)
+    assert done == results
+    assert len(results) == 1
+    assert results[0].table == "products"
+    assert results[0].error is None
+    assert results[0].seconds > 0
+
+    with engine.connect() as connection:
+        assert has_index("products", "idx_zdb_products", connection=connection)
+
+
+def test_build_indexes_query(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+    assert len(q.all()) == 2
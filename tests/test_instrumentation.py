@@ -0,0 +1,47 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery, instrumentation
+from sqlalchemy_zdb.instrumentation import ZdbStats
+
+
+def test_instrumentation_events(dbsession):
+    events = []
+    for name in instrumentation.EVENTS:
+        instrumentation.listen(name, events.append)
+
+    try:
+        q = ZdbQuery(Products, session=dbsession)
+        q = q.filter(Products.author == "foo")
+        assert len(q.all()) == 2
+    finally:
+        for name in instrumentation.EVENTS:
+            instrumentation.remove(name, events.append)
+    assert not instrumentation._listeners
+
+    assert [e.name for e in events] == [
+        "before_execute", "before_compile", "after_compile", "after_execute", "after_hydrate"]
+    hydrate = events[-1]
+    assert hydrate.table == "products"
+    assert hydrate.query == "'author:\"foo\"'"
+    assert hydrate.shape == "author:?"
+    assert hydrate.rows == 2
+    assert all(e.seconds >= 0 for e in events if e.name.startswith("after_"))
+
+
+def test_instrumentation_stats(dbsession):
+    stats = ZdbStats().enable()
+    try:
+        for author in ["foo", "admin"]:
+            q = ZdbQuery(Products, session=dbsession)
+            q = q.filter(Products.author == author)
+            q.all()
+    finally:
+        stats.disable()
+
+    phases = {item["phase"]: item for item in stats.as_dict()}
+    assert set(phases) == {"compile", "execute", "hydrate"}
+    assert all(item["shape"] == "author:?" and item["count"] == 2 for item in phases.values())
+    assert phases["hydrate"]["rows"] == 4
+
+    text = stats.to_prometheus()
+    assert 'zdb_query_seconds_count{table="products",shape="author:?",phase="execute"} 2' in text
+    assert 'zdb_query_rows_total{table="products",shape="author:?"} 4' in text
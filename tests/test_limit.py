@@ -0,0 +1,91 @@
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.types import ZdbScore
+from sqlalchemy_zdb.utils import query_to_sql
+
+
+def test_multi_key_limit(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.order_by(ZdbScore("desc"), Products.price.asc()).limit(2)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> '#limit(_score desc, price asc, 0, 2) price > 1000' ORDER BY zdb_score(products, ctid) DESC, products.price ASC
+    """) is True
+
+    assert [r.id for r in q.all()] == [2, 3]
+
+
+def test_limit_sql_leading_key(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.order_by(Products.name.asc(), Products.price.desc()).limit(2)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 1000' ORDER BY products.name ASC, products.price DESC
+ LIMIT 2
+    """) is True
+
+    assert [r.id for r in q.all()] == [2, 4]
+
+
+def test_limit_sql_trailing_key(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000)
+    q = q.order_by(Products.price.desc(), Products.name.asc()).limit(2)
+
+    # ties on price at the cutoff are broken by name, in Postgres
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 1000' ORDER BY products.price DESC, products.name ASC
+ LIMIT 2
+    """) is True
+
+    assert [r.id for r in q.all()] == [4, 1]
+
+
+def test_limit_pushed(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000).limit(2).offset(1)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> '#limit(_score desc, 1, 2) price > 1000'
+    """) is True
+
+    assert len(q.all()) == 2
+
+
+def test_limit_sql_filter(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000, Products.inventory_count >= 42).limit(2)
+
+    # the top hits of Elasticsearch could be dropped by the sqla filter
+    assert "#limit" not in query_to_sql(q)
+    assert sorted(r.id for r in q.all()) == [1, 3]
+
+    assert "#limit(_score desc, 0, 2)" in query_to_sql(q.push_limit())
+
+
+def test_limit_not_pushed(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1000).limit(2).push_limit(False)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 1000'
+ LIMIT 2
+    """) is True
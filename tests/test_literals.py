@@ -0,0 +1,80 @@
+import datetime
+import decimal
+
+import pytest
+from sqlalchemy import Date
+from sqlalchemy.dialects import postgresql
+
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery, zdb_raw_query
+from sqlalchemy_zdb.utils import query_to_sql
+from sqlalchemy_zdb.compiler import LITERAL_ENCODERS, QUERY_CACHE, register_literal_encoder
+
+
+def statement_sql(q):
+    return str(q.statement.compile(dialect=postgresql.dialect()))
+
+
+def test_decimal(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.price > decimal.Decimal("1.5E+4"))
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 15000'
+    """) is True
+
+    results = q.all()
+    assert [r.id for r in results] == [4]
+
+
+def test_float(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.price < 1249.5)
+    assert "price < 1249.5" in query_to_sql(q)
+
+    results = q.all()
+    assert [r.id for r in results] == [2]
+
+
+def test_dates(dbsession):
+    start = datetime.datetime(2015, 8, 1)
+    end = datetime.datetime(2015, 8, 31, 12, 30)
+
+    q = dbsession.query(Products.id).filter(zdb_raw_query(
+        Products.availability_date >= start, Products.availability_date <= end))
+    assert "availability_date >= \"2015-08-01 00:00:00\" and " \
+           "availability_date <= \"2015-08-31 12:30:00\"" in statement_sql(q)
+
+    q = dbsession.query(Products.id).filter(zdb_raw_query(
+        Products.availability_date.between(start.date(), end.date())))
+    assert "availability_date:\"2015-08-01\" /to/ \"2015-08-31\"" in statement_sql(q)
+
+    q = dbsession.query(Products.id).filter(zdb_raw_query(
+        Products.availability_date.in_([start.date(), end.date()])))
+    assert "availability_date:(\"2015-08-01\",\"2015-08-31\")" in statement_sql(q)
+
+
+@pytest.fixture
+def date_encoder():
+    encoders = dict(LITERAL_ENCODERS)
+    register_literal_encoder(datetime.date, lambda value: value.strftime("%Y%m%d"), Date)
+    yield
+    LITERAL_ENCODERS.clear()
+    LITERAL_ENCODERS.update(encoders)
+    QUERY_CACHE.clear()
+
+
+def test_register_encoder(dbsession, date_encoder):
+    q = dbsession.query(Products.id).filter(zdb_raw_query(
+        Products.availability_date > datetime.date(2015, 8, 1)))
+    assert "availability_date > 20150801" in statement_sql(q)
+
+    # a datetime has an encoder of its own
+    q = dbsession.query(Products.id).filter(zdb_raw_query(
+        Products.availability_date > datetime.datetime(2015, 8, 1)))
+    assert "availability_date > \"2015-08-01 00:00:00\"" in statement_sql(q)
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import sessionmaker
+
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.multisearch import ZdbMultiSearch
+
+
+def test_multisearch(engine, dbsession):
+    search = ZdbMultiSearch(sessionmaker(bind=engine))
+    search.add(ZdbQuery(Products, session=dbsession).filter(Products.author == "foo"))
+    search.add(ZdbQuery(Products, session=dbsession).filter(Products.author == "admin"), boost=10.0)
+
+    hits = search.execute()
+    assert len(hits) == 4
+    assert all(hit.table == "products" for hit in hits)
+    assert [hit.score for hit in hits] == sorted([hit.score for hit in hits], reverse=True)
+    # boosted hits rank first
+    assert sorted(hit.entity.id for hit in hits[:2]) == [1, 2]
+
+
+def test_multisearch_limit(engine, dbsession):
+    search = ZdbMultiSearch(sessionmaker(bind=engine), max_workers=1)
+    search.add(ZdbQuery(Products, session=dbsession).filter(Products.price > 1000))
+    search.add(ZdbQuery(Products, session=dbsession).filter(Products.author == "foo"))
+
+    hits = search.execute(limit=3)
+    assert len(hits) == 3
@@ -0,0 +1,68 @@
+from sqlalchemy import or_
+
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.normalizer import normalize, clause_key
+from sqlalchemy_zdb.utils import query_to_sql
+
+
+def test_merge_ranges(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price >= 1000, Products.price > 500, Products.price <= 10000)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price:1000 /to/ 10000'
+    """) is True
+
+    assert sorted(p.id for p in q.all()) == [1, 2, 3]
+
+
+def test_or_equals_to_in(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.author == "foo", Products.author == "bar", Products.author == "foo"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:("bar","foo")'
+    """) is True
+
+
+def test_or_kept(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.price > 10000, Products.author == "foo"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> '(author:"foo" or price > 10000)'
+    """) is True
+
+
+def test_canonical_order(dbsession):
+    q1 = ZdbQuery(Products, session=dbsession)
+    q1 = q1.filter(Products.price > 1000, Products.author == "foo", Products.author == "foo")
+
+    q2 = ZdbQuery(Products, session=dbsession)
+    q2 = q2.filter(Products.author == "foo", Products.price > 1000)
+
+    assert query_to_sql(q1) == query_to_sql(q2)
+    assert validate_sql(query_to_sql(q1), target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:"foo" and price > 1000'
+    """) is True
+
+
+def test_custom_operator():
+    match = Products.author.op("~")("fo+")
+    assert clause_key(match) == clause_key(Products.author.op("~")("fo+"))
+    assert clause_key(match) != clause_key(Products.author.op("!~")("fo+"))
+
+    assert normalize([match, Products.author.op("~")("fo+")]) == [match]
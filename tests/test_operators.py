@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import or_
+
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.utils import query_to_sql
+from sqlalchemy_zdb.exceptions import InvalidParameterException
+
+
+def test_not_like(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.author.notlike("foo"))
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'not author:"foo"'
+    """) is True
+
+    results = q.all()
+    assert len(results) == 2
+    assert all(r.author != "foo" for r in results)
+
+
+def test_not_in(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.price.notin_([1249, 1899]))
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'not price:(1249,1899)'
+    """) is True
+
+    results = q.all()
+    assert sorted(r.id for r in results) == [1, 4]
+
+
+def test_null(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.author == None)
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:NULL'
+    """) is True
+
+
+def test_wildcards(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(Products.short_summary.startswith("dev"))
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'short_summary:dev*'
+    """) is True
+
+    results = q.all()
+    assert len(results) == 1
+    assert "device" in results[0].short_summary
+
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.long_description.contains("pabl"))
+    assert "long_description:*pabl*" in query_to_sql(q)
+
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price.startswith(12))
+    with pytest.raises(InvalidParameterException):
+        query_to_sql(q)
+
+
+def test_negated_group(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+
+    q = q.filter(~or_(Products.author == "foo", Products.price > 9000))
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'not (author:"foo" or price > 9000)'
+    """) is True
+
+    results = q.all()
+    assert [r.id for r in results] == [2]
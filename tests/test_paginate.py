@@ -0,0 +1,39 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+
+
+def test_paginate_keyset(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 0)
+
+    pages = list(q.paginate_keyset(order_by=Products.price.asc(), page_size=3))
+    assert [len(page) for page in pages] == [3, 1]
+    assert [r.id for page in pages for r in page] == [2, 3, 1, 4]
+
+    pages = list(q.paginate_keyset(order_by=Products.price.desc(), page_size=1))
+    assert [r.id for page in pages for r in page] == [4, 1, 3, 2]
+
+
+def test_paginate_keyset_sql_filter(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 0)
+    q = q.filter(Products.inventory_count >= 2)
+
+    pages = list(q.paginate_keyset(order_by=Products.price.asc(), page_size=2))
+    assert [r.id for page in pages for r in page] == [2, 3, 1]
+
+
+def test_paginate_keyset_null_keys(dbsession):
+    for i in range(5):
+        dbsession.add(Products(id=10 + i, name="No price %d" % i, author="foo"))
+    dbsession.flush()
+
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+
+    pages = list(q.paginate_keyset(order_by=Products.price.asc(), page_size=2))
+    assert [r.id for page in pages for r in page] == [3, 4]
+
+    q = q.filter(Products.inventory_count == None)
+    pages = list(q.paginate_keyset(order_by=Products.price.asc(), page_size=2))
+    assert pages == []
@@ -0,0 +1,105 @@
+import re
+
+from sqlalchemy import and_, or_, func
+
+from tests.models import Products
+from tests.conftest import validate_sql
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.types import ZdbLiteral
+from sqlalchemy_zdb.utils import query_to_sql
+
+
+def test_mixed_or(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(and_(Products.author == "foo", Products.name == "Box"), Products.price < 2000))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> '(author:"foo" or price < 2000)' AND (zdb('products', ctid) ==> 'author:"foo"' AND products.name = Box OR zdb('products', ctid) ==> 'price < 2000')
+    """) is True
+
+    assert sorted(r.id for r in q.all()) == [2, 3, 4]
+
+
+def test_mixed_or_sql_only_part(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.author == "foo", Products.name == "Baseball"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:"foo"' OR products.name = Baseball
+    """) is True
+
+    assert sorted(r.id for r in q.all()) == [2, 3, 4]
+
+
+def test_negated_mixed_or(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(~or_(Products.author == "foo", Products.name == "Baseball"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author != "foo"' AND products.name != Baseball
+    """) is True
+
+    assert [r.id for r in q.all()] == [1]
+
+
+def test_sql_expression(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(func.lower(Products.name) == "box", Products.price > 1000)
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'price > 1000' AND lower(products.name) = box
+    """) is True
+
+    assert [r.id for r in q.all()] == [4]
+
+
+def test_mixed_or_regex(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.author.like(re.compile("fo[a-z]")), Products.name == "Baseball"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:~"fo[a-z]"' OR products.name = Baseball
+    """) is True
+
+    assert sorted(r.id for r in q.all()) == [2, 3, 4]
+
+
+def test_mixed_or_match(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.author.match("foo"), Products.price < 2000, Products.name == "Baseball"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> '(author:@"foo" or price < 2000)' OR products.name = Baseball
+    """) is True
+
+
+def test_mixed_or_zdb_literal(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(or_(Products.author == ZdbLiteral("fo*"), Products.name == "Baseball"))
+
+    sql = query_to_sql(q)
+    assert validate_sql(sql, target="""
+SELECT products.id, products.name, products.keywords, products.short_summary, products.long_description, products.price, products.inventory_count, products.discontinued, products.availability_date, products.author
+FROM products
+WHERE zdb('products', ctid) ==> 'author:fo*' OR products.name = Baseball
+    """) is True
+
+    assert sorted(r.id for r in q.all()) == [2, 3, 4]
@@ -0,0 +1,58 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.cache import TTLCache
+from sqlalchemy_zdb.resultcache import ResultCache
+
+
+def test_result_cache(dbsession):
+    result_cache = ResultCache(TTLCache(maxsize=16, ttl=60))
+
+    for _ in range(3):
+        q = ZdbQuery(Products, session=dbsession).cache(result_cache)
+        q = q.filter(Products.author == "foo")
+        results = q.all()
+        assert sorted(r.id for r in results) == [3, 4]
+
+    info = result_cache.info()
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+    assert info["hit_ratio"] == 2 / 3
+    assert info["memory"] > 0
+
+
+def test_result_cache_invalidate(dbsession):
+    result_cache = ResultCache(TTLCache(maxsize=16, ttl=60))
+    result_cache.listen(dbsession)
+
+    q = ZdbQuery(Products, session=dbsession).cache(result_cache)
+    q = q.filter(Products.author == "foo")
+    q.all()
+
+    dbsession.add(Products(id=5, name="Box", author="foo", price=100, inventory_count=1))
+    dbsession.commit()
+
+    q = ZdbQuery(Products, session=dbsession).cache(result_cache)
+    q = q.filter(Products.author == "foo")
+    q.all()
+
+    assert result_cache.info()["hits"] == 0
+    assert result_cache.info()["misses"] == 2
+
+
+def test_result_cache_detached(dbsession):
+    result_cache = ResultCache(TTLCache(maxsize=16, ttl=60))
+
+    q = ZdbQuery(Products, session=dbsession).cache(result_cache)
+    q = q.filter(Products.author == "foo")
+    names = sorted(r.name for r in q.all())
+
+    # changing a result leaves the cached values alone
+    for r in q.all():
+        r.name = "Changed"
+        r.keywords.append("changed")
+    dbsession.expunge_all()
+
+    results = q.all()
+    assert result_cache.info()["hits"] == 2
+    assert sorted(r.name for r in results) == names
+    assert all("changed" not in r.keywords for r in results)
@@ -0,0 +1,57 @@
+import re
+
+import pytest
+from sqlalchemy.sql.elements import ClauseElement
+
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+from sqlalchemy_zdb.types import ZdbScore
+
+pytestmark = pytest.mark.skipif(not hasattr(ClauseElement, "_generate_cache_key"),
+                                reason="statement cache keys need SQLAlchemy 1.4+")
+
+
+def cache_key(q):
+    return q._zdb_make_query().statement._generate_cache_key()
+
+
+def test_cache_key_bind_query(dbsession):
+    def q(author, direction="desc"):
+        return ZdbQuery(Products, session=dbsession, bind_query=True).filter(
+            Products.author == author).order_by(ZdbScore(direction)).limit(5)
+
+    # the values are bound parameters, only the shape counts
+    assert cache_key(q("foo")) == cache_key(q("bar"))
+    assert cache_key(q("foo")) != cache_key(q("foo", "asc"))
+    assert cache_key(q("foo")) != cache_key(q("foo").limit(10))
+
+    # a regex renders a different query
+    regex = ZdbQuery(Products, session=dbsession, bind_query=True).filter(
+        Products.author.like(re.compile("fo.*")))
+    plain = ZdbQuery(Products, session=dbsession, bind_query=True).filter(
+        Products.author.like("foo"))
+    assert cache_key(regex) != cache_key(plain)
+
+
+def test_cache_key_literal_query(dbsession):
+    def q(author):
+        return ZdbQuery(Products, session=dbsession).filter(Products.author == author)
+
+    # values are rendered into the SQL text, they are part of the key
+    assert cache_key(q("foo")) == cache_key(q("foo"))
+    assert cache_key(q("foo")) != cache_key(q("bar"))
+
+
+def test_cache_hit(dbsession):
+    connection = dbsession.connection()
+
+    hits = []
+    for author in ("foo", "bar", "foo"):
+        q = ZdbQuery(Products, session=dbsession, bind_query=True)
+        q = q.filter(Products.author == author, Products.price > 1000)
+        result = connection.execute(q._zdb_make_query().statement)
+        hits.append(result.context.cache_hit)
+        assert all(row.author == author for row in result)
+
+    # compiled once, reused for the other values
+    assert [str(hit) for hit in hits[1:]] == ["CACHE_HIT", "CACHE_HIT"]
@@ -0,0 +1,29 @@
+from tests.models import Products
+from sqlalchemy_zdb import ZdbQuery
+
+
+def test_iter(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.author == "foo")
+
+    results = [r for r in q]
+    assert len(results) == 2
+    assert all(r.author == "foo" for r in results)
+
+
+def test_yield_per(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price > 1500)
+
+    results = list(q.yield_per(1))
+    assert len(results) == 3
+    assert all(r.price > 1500 for r in results)
+
+
+def test_stream(dbsession):
+    q = ZdbQuery(Products, session=dbsession)
+    q = q.filter(Products.price < 10000)
+    q = q.filter(Products.inventory_count >= 42)
+
+    results = list(q.stream(batch_size=1))
+    assert sorted(r.id for r in results) == [1, 3]